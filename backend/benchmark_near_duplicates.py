@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the MinHash/LSH near-duplicate index on a synthetic 100k question bank
+"""
+
+import random
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.near_duplicate_index import NearDuplicateIndex, question_text
+
+TOPICS = ["python lists", "recursion", "binary search", "linked lists", "hash maps", "sorting", "graphs",
+          "dynamic programming", "supervised learning", "neural networks", "sql joins", "operating systems"]
+TEMPLATES = [
+    "What is the time complexity of {op} in {topic} with {n} elements?",
+    "Which statement about {op} in {topic} is true for case {n}?",
+    "Write a function that performs {op} on {topic} input number {n}.",
+    "Explain how {op} works in {topic} when the size is {n}.",
+]
+# Light rewordings that keep the question's content in order: these should be caught
+PARAPHRASES = [
+    "What's the time complexity of {op} in {topic} with {n} elements?",
+    "Which one of these statements about {op} in {topic} is true for case {n}?",
+    "Write a function which performs {op} on the {topic} input number {n}.",
+    "Explain how {op} works in {topic} when its size is {n}.",
+]
+# Code questions whose operands are swapped share every word but are different questions
+CODE_TEMPLATE = "What is the output of print({x} {operator} {y}) in Python?"
+OPERATORS = ["**", "//", "%", "-", "/"]
+OPERATIONS = ["insertion", "deletion", "lookup", "traversal", "merging", "splitting", "reversal", "rotation"]
+
+def make_question(rng: random.Random, templates):
+    slot = rng.randrange(len(templates))
+    fields = {"topic": rng.choice(TOPICS), "op": rng.choice(OPERATIONS), "n": rng.randrange(100000)}
+    return slot, fields, templates[slot].format(**fields)
+
+def make_code_question(rng: random.Random):
+    x, y = rng.sample(range(2, 10), 2)
+    fields = {"x": x, "y": y, "operator": rng.choice(OPERATORS)}
+    options = [str(rng.randrange(100)) for _ in range(4)]
+    return fields, options, question_text({"question": CODE_TEMPLATE.format(**fields), "options": options})
+
+def benchmark(num_stored: int = 100_000, num_queries: int = 1_000, threshold: float = 0.7):
+    rng = random.Random(42)
+    print(f"🧪 Building index with {num_stored:,} questions (threshold={threshold})...")
+    index = NearDuplicateIndex(threshold=threshold)
+    stored, code = [], []
+    start = time.perf_counter()
+    for i in range(num_stored):
+        if i % 10 == 0:
+            fields, options, text = make_code_question(rng)
+            code.append((fields, options))
+        else:
+            slot, fields, text = make_question(rng, TEMPLATES)
+            stored.append((slot, fields))
+        index.add(i, text)
+    build_s = time.perf_counter() - start
+    print(f"⏱️ Build: {build_s:.2f}s ({build_s / num_stored * 1e6:.1f} µs/question)")
+
+    # Rewordings of stored questions should be found; swapped operands and fresh questions should not
+    paraphrased = [PARAPHRASES[slot].format(**fields) for slot, fields in rng.sample(stored, num_queries)]
+    swapped = [question_text({"question": CODE_TEMPLATE.format(x=f["y"], y=f["x"], operator=f["operator"]),
+                              "options": options}) for f, options in rng.sample(code, num_queries)]
+    fresh = [f"Describe a real-world use of {rng.choice(TOPICS)} in project {rng.randrange(10**9)} for team {i}."
+             for i in range(num_queries)]
+
+    start = time.perf_counter()
+    hits = sum(index.find_duplicate(text) is not None for text in paraphrased)
+    false_hits = sum(index.find_duplicate(text) is not None for text in fresh)
+    swapped_hits = sum(index.find_duplicate(text) is not None for text in swapped)
+    query_s = time.perf_counter() - start
+    per_query_us = query_s / (3 * num_queries) * 1e6
+
+    print(f"⏱️ Query: {per_query_us:.1f} µs/lookup over {3 * num_queries:,} lookups")
+    print(f"✅ Rewordings detected: {hits}/{num_queries} ({hits / num_queries:.1%})")
+    print(f"⚠️ False positives on swapped operands: {swapped_hits}/{num_queries} ({swapped_hits / num_queries:.1%})")
+    print(f"⚠️ False positives on fresh questions: {false_hits}/{num_queries} ({false_hits / num_queries:.1%})")
+
+    # Linear scan over the same signatures for comparison
+    sample = paraphrased[:50]
+    signatures = list(index._signatures.values())
+    start = time.perf_counter()
+    for text in sample:
+        sig = index.signature(text)
+        any(index.similarity(sig, other) >= threshold for other in signatures)
+    scan_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"🐢 Linear scan: {scan_us:.1f} µs/lookup ({scan_us / per_query_us:.0f}x slower)")
+
+if __name__ == "__main__":
+    benchmark()
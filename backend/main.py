@@ -1,7 +1,18 @@
 # Entry point for backend
+if __name__ == "__main__":
+    # `python main.py` is served as `python -m uvicorn main:app`: spawned transcription workers
+    # re-import __main__, and uvicorn's entry module (unlike this file) builds no services
+    import os, runpy, sys
+    sys.argv = [sys.argv[0], "main:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+                "--host", "0.0.0.0", "--port", "8000"]
+    runpy.run_module("uvicorn", run_name="__main__", alter_sys=True)
+    sys.exit()
+
 from fastapi import FastAPI, HTTPException, Response, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import os, uvicorn
+import os, json, math, base64, binascii
+from typing import Optional
 
 from services.quiz_service import QuizService
 from services.coding_service import CodingService
@@ -10,13 +21,22 @@ from services.auth_service import AuthService
 from services.transcription_service import TranscriptionService
 from services.study_logs_service import StudyLogsService
 from services.notification_service import NotificationService
+from services.ai_service import get_ai_metrics
+from services.ai_resilience import AIUnavailableError
+from services.transcription_pool import TranscriptionUnavailableError
+from services.transcription_job_service import TranscriptionJobService
+from services.audio_upload import UploadTooLargeError, read_audio_request
+from services.asr_engines import UnknownASREngineError, get_engine, list_engines
 from models.quiz_models import (
     GeneratePersonalizedQuizInput, GeneratePersonalizedQuizOutput,
     EvaluateQuizInput, EvaluateQuizOutput,
+    SubmitQuizInput, SubmitQuizOutput,
+    BatchEvaluateQuizInput, BatchEvaluateQuizOutput,
 )
 from models.coding_models import (
     GenerateCodingPracticeInput, GenerateCodingPracticeOutput,
     EvaluateCodingPracticeInput, EvaluateCodingPracticeOutput,
+    SubmitCodingPracticeInput, SubmitCodingPracticeOutput,
 )
 from models.feedback_models import (
     FeedbackInput, FeedbackOutput, GetStudentFeedbackInput,
@@ -29,7 +49,7 @@ from models.auth_models import (
 from models.transcription_models import (
     TranscriptionEvaluationInput, TranscriptionEvaluationOutput,
     CommunicationHistoryInput, CommunicationHistoryOutput,
-    TextEvaluationInput
+    TextEvaluationInput, TranscriptionJobStatus
 )
 from models.study_logs_models import (
     StudyLogInput, StudyLogOutput, StudyLogListOutput, DeleteStudyLogInput
@@ -45,9 +65,15 @@ coding_service = CodingService()
 feedback_service = FeedbackService()
 auth_service = AuthService()
 transcription_service = TranscriptionService()
+transcription_jobs = TranscriptionJobService(transcription_service.evaluate_audio)
 study_logs_service = StudyLogsService()
 notification_service = NotificationService()
 
+@app.on_event("shutdown")
+def shutdown_workers():
+    transcription_service.pool.shutdown()
+    coding_service.evaluation_cache.flush()
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -106,6 +132,11 @@ async def read_root():
 async def test_cors():
     return {"message": "CORS test successful"}
 
+@app.get("/ai/metrics")
+async def ai_metrics_endpoint():
+    """AI call metrics: request coalescing, rate limiter, circuit breaker and worker threads"""
+    return get_ai_metrics()
+
 # Quiz endpoints
 @app.post("/quiz/generate", response_model=GeneratePersonalizedQuizOutput)
 async def generate_quiz_endpoint(input_data: GeneratePersonalizedQuizInput):
@@ -113,6 +144,8 @@ async def generate_quiz_endpoint(input_data: GeneratePersonalizedQuizInput):
         return await quiz_service.generate_personalized_quiz(input_data)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except AIUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {e}")
     except Exception as e:
@@ -129,6 +162,55 @@ async def evaluate_quiz_endpoint(input_data: EvaluateQuizInput):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
 
+@app.post("/quiz/submit", response_model=SubmitQuizOutput)
+async def submit_quiz_endpoint(input_data: SubmitQuizInput):
+    """Evaluate a quiz and record the result in the student's history in one request"""
+    try:
+        evaluation = await quiz_service.evaluate_quiz(input_data)
+        recorded = False
+        if input_data.student_register_number:
+            recorded = await feedback_service.save_quiz_result(input_data.student_register_number, {
+                "score": evaluation.overallScore,
+                "total_questions": len(evaluation.individualFeedback),
+                "time_taken": input_data.time_taken,
+                "subject": input_data.subject,
+            })
+        return SubmitQuizOutput(**evaluation.model_dump(), recorded=recorded)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"AI evaluation failed: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+@app.post("/quiz/evaluate-batch", response_model=BatchEvaluateQuizOutput)
+async def evaluate_quiz_batch_endpoint(input_data: BatchEvaluateQuizInput):
+    """Score many students' answers to one quiz, optionally recording all results in one write"""
+    try:
+        result = quiz_service.evaluate_quiz_batch(input_data)
+        if input_data.persist:
+            total_questions = len(result.question_correct_rates)
+            result.recorded = await feedback_service.save_quiz_results([
+                {
+                    "student_register_number": s.student_register_number,
+                    "score": s.score,
+                    "total_questions": total_questions,
+                    "time_taken": input_data.time_taken,
+                    "subject": input_data.subject,
+                }
+                for s in result.scores
+            ])
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch evaluation error: {e}")
+
+@app.get("/quiz/prefetch/stats")
+async def quiz_prefetch_stats_endpoint():
+    """Speculative quiz generation counters: scheduled, skipped by caps, hits and misses"""
+    return quiz_service.prefetch.get_stats()
+
 # Coding endpoints
 @app.post("/coding/generate", response_model=GenerateCodingPracticeOutput)
 async def generate_coding_practice_endpoint(input_data: GenerateCodingPracticeInput):
@@ -136,6 +218,8 @@ async def generate_coding_practice_endpoint(input_data: GenerateCodingPracticeIn
         return await coding_service.generate_coding_practice(input_data)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except AIUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {e}")
     except Exception as e:
@@ -147,11 +231,42 @@ async def evaluate_coding_practice_endpoint(input_data: EvaluateCodingPracticeIn
         return await coding_service.evaluate_coding_practice(input_data)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except AIUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=f"AI evaluation failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
 
+@app.post("/coding/submit", response_model=SubmitCodingPracticeOutput)
+async def submit_coding_practice_endpoint(input_data: SubmitCodingPracticeInput):
+    """Evaluate a coding answer and record the result in the student's history in one request"""
+    try:
+        evaluation = await coding_service.evaluate_coding_practice(input_data)
+        recorded = False
+        if input_data.student_register_number:
+            recorded = await feedback_service.save_coding_result(input_data.student_register_number, {
+                "question": input_data.question,
+                "score": min(100, max(0, evaluation.score * 10)),
+                "is_correct": evaluation.isCorrect,
+                "time_taken": input_data.time_taken,
+                "subject": input_data.subject,
+            })
+        return SubmitCodingPracticeOutput(**evaluation.model_dump(), recorded=recorded)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AIUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"AI evaluation failed: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+@app.get("/coding/bank/stats")
+async def coding_bank_stats_endpoint():
+    """Question bank pool sizes, topic popularity and in-flight refills"""
+    return coding_service.question_bank.get_stats()
+
 # Authentication endpoints
 @app.post("/auth/login", response_model=LoginOutput)
 async def login_endpoint(login_data: LoginInput):
@@ -266,14 +381,108 @@ async def save_communication_result_endpoint(data: dict):
         raise HTTPException(status_code=500, detail=f"Save communication result error: {e}")
 
 # Transcription endpoints
+def _check_engine(name: Optional[str]):
+    try:
+        get_engine(name)
+    except UnknownASREngineError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/transcription/engines")
+async def get_transcription_engines():
+    """ASR engines this server knows about, which are installed, and the default"""
+    return {"engines": list_engines()}
+
 @app.post("/transcription/evaluate", response_model=TranscriptionEvaluationOutput)
 async def evaluate_transcription_endpoint(input_data: TranscriptionEvaluationInput):
     """Evaluate audio transcription and provide communication analysis"""
+    _check_engine(input_data.engine)
     try:
         return await transcription_service.evaluate_transcription(input_data)
+    except TranscriptionUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transcription evaluation error: {e}")
+
+async def _read_audio_upload(request: Request):
+    try:
+        return await read_audio_request(request)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/transcription/upload", response_model=TranscriptionEvaluationOutput)
+async def evaluate_transcription_upload(request: Request):
+    """Evaluate binary audio sent as multipart (field 'audio') or as the raw request body"""
+    upload = await _read_audio_upload(request)
+    _check_engine(upload.engine)
+    try:
+        return await transcription_service.evaluate_audio(upload.audio_bytes, upload.audio_format,
+                                                          student_register_number=upload.student_register_number,
+                                                          engine=upload.engine)
+    except TranscriptionUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription evaluation error: {e}")
 
+def _queue_transcription_job(audio_bytes: bytes, audio_format: str, student_register_number: Optional[str] = None,
+                             engine: Optional[str] = None):
+    _check_engine(engine)
+    try:
+        job = transcription_jobs.submit(audio_bytes, audio_format, student_register_number, engine)
+    except TranscriptionUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return JSONResponse(status_code=202, content=job.model_dump(), headers={"Location": f"/transcription/jobs/{job.job_id}"})
+
+@app.post("/transcription/jobs", response_model=TranscriptionJobStatus, status_code=202)
+async def create_transcription_job(input_data: TranscriptionEvaluationInput):
+    """Queue an audio evaluation; poll or stream the job for progress and the result"""
+    try:
+        audio_bytes = base64.b64decode(input_data.audioData)
+    except binascii.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid base64 audio data: {e}")
+    return _queue_transcription_job(audio_bytes, input_data.format, input_data.student_register_number,
+                                    input_data.engine)
+
+@app.post("/transcription/jobs/upload", response_model=TranscriptionJobStatus, status_code=202)
+async def create_transcription_upload_job(request: Request):
+    """Queue an evaluation of binary audio sent as multipart or as the raw request body"""
+    upload = await _read_audio_upload(request)
+    return _queue_transcription_job(*upload)
+
+@app.get("/transcription/jobs/stats")
+async def transcription_job_stats():
+    """Job queue depth and outcomes, plus worker pool occupancy"""
+    return {"jobs": transcription_jobs.get_stats(), "pool": transcription_service.pool.get_stats()}
+
+@app.get("/transcription/jobs/{job_id}", response_model=TranscriptionJobStatus)
+async def get_transcription_job(job_id: str):
+    """Current status of a transcription job, with the result once completed"""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found or expired")
+    return job
+
+@app.get("/transcription/jobs/{job_id}/events")
+async def stream_transcription_job(job_id: str):
+    """Server-sent events for each stage of a job; the final event carries the full status"""
+    if transcription_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found or expired")
+
+    async def event_stream():
+        async for event in transcription_jobs.follow(job_id):
+            yield f"event: stage\ndata: {json.dumps(event)}\n\n"
+        final = transcription_jobs.get(job_id)
+        if final is not None:
+            yield f"event: {final.status}\ndata: {final.model_dump_json()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/transcription/pool/stats")
+async def transcription_pool_stats():
+    """Worker pool occupancy and job outcomes for audio transcription"""
+    return transcription_service.pool.get_stats()
+
 @app.post("/transcription/evaluate-text", response_model=TranscriptionEvaluationOutput)
 async def evaluate_text_endpoint(input_data: TextEvaluationInput):
     """Evaluate text-only transcription and provide communication analysis (faster, no audio processing)"""
@@ -323,7 +532,13 @@ async def delete_communication_history_endpoint(request: Request):
 async def create_study_log_endpoint(input_data: StudyLogInput):
     """Create a new study log for a user"""
     try:
-        return study_logs_service.create_study_log(input_data)
+        log = study_logs_service.create_study_log(input_data)
+        # Students usually ask for a quiz right after saving a log, so start generating it now
+        # The quiz endpoint identifies students by register number, not by auth user ID
+        register_number = auth_service.get_register_number(log.user_id)
+        if register_number:
+            quiz_service.prefetch_quiz(log.content, register_number)
+        return log
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Create study log error: {e}")
 
@@ -412,6 +627,3 @@ async def delete_notification_endpoint(notification_id: str, user_id: str):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete notification error: {e}")
-
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,15 +1,25 @@
 # Coding-related database models
 from pydantic import BaseModel, Field
-from typing import List, Literal
+from typing import Any, List, Literal, Optional
 
 class GenerateCodingPracticeInput(BaseModel):
     topic: str = Field(..., description='The topic to generate coding questions for.', min_length=2, max_length=50)
     level: Literal["Beginner", "Intermediate", "Advanced"] = Field(..., description="The difficulty level for the questions.")
+    student_register_number: Optional[str] = Field(None, description="Student requesting the set; used to avoid repeating questions they have already seen.")
 
 class GeneratedCodingQuestion(BaseModel):
     type: Literal["coding"] = "coding"
     question: str = Field(..., description="The coding challenge or question.")
 
+class CodingTestCase(BaseModel):
+    input: List[Any] = Field(..., description="Positional arguments passed to the solution function.")
+    expected: Any = Field(..., description="The value the solution function must return.")
+
+class CodingQuestionSpec(GeneratedCodingQuestion):
+    """A generated question plus the server-side test cases used for local grading (never sent to clients)."""
+    function_name: Optional[str] = Field(None, description="Name of the Python function the student must define.")
+    test_cases: Optional[List[CodingTestCase]] = Field(None, description="Test cases for the solution function.")
+
 class GenerateCodingPracticeOutput(BaseModel):
     questions: List[GeneratedCodingQuestion]
 
@@ -22,3 +32,11 @@ class EvaluateCodingPracticeOutput(BaseModel):
     feedback: str = Field(..., description="Constructive feedback on the user's code.")
     score: int = Field(..., ge=0, le=10, description="Score from 0 to 10.")
     suggestions: str = Field(..., description="Suggestions for improvement.")
+
+class SubmitCodingPracticeInput(EvaluateCodingPracticeInput):
+    student_register_number: Optional[str] = Field(None, description="Student submitting the code; the result is recorded when given.")
+    time_taken: str = Field("N/A", description="Time the student spent on the question.")
+    subject: str = Field("Coding", description="Subject recorded with the result.")
+
+class SubmitCodingPracticeOutput(EvaluateCodingPracticeOutput):
+    recorded: bool = Field(False, description="Whether the result was saved to the student's history.")
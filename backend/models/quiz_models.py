@@ -1,14 +1,15 @@
 # Quiz-related database models
 from pydantic import BaseModel, Field
-from typing import List, Union, Literal
+from typing import List, Optional, Union, Literal
 
 class Evaluation(BaseModel):
     isCorrect: bool = Field(..., description="Whether the user's answer is correct.")
     feedback: str = Field(..., description="Feedback for the user's answer.")
     score: int = Field(..., ge=0, le=10, description="Score from 0 to 10.")
+    correctAnswer: Optional[int] = Field(None, description="Index of the correct option, revealed once the answer is graded.")
 
 class EvaluateQuizInput(BaseModel):
-    questions: List[dict] = Field(..., description="The array of quiz questions with their content.")
+    quiz_id: str = Field(..., description="Quiz returned by /quiz/generate; the server looks up its questions and answer key. Each quiz can be graded once.")
     answers: List[Union[str, int]] = Field(..., description="The user's submitted answers.")
 
 class EvaluateQuizOutput(BaseModel):
@@ -16,6 +17,37 @@ class EvaluateQuizOutput(BaseModel):
     overallScore: int = Field(..., ge=0, le=100)
     suggestions: str
 
+class SubmitQuizInput(EvaluateQuizInput):
+    student_register_number: Optional[str] = Field(None, description="Student taking the quiz; the result is recorded when given.")
+    time_taken: str = Field("00:00", description="Time the student spent on the quiz.")
+    subject: str = Field("General Quiz", description="Subject recorded with the result.")
+
+class SubmitQuizOutput(EvaluateQuizOutput):
+    recorded: bool = Field(False, description="Whether the result was saved to the student's history.")
+
+class BatchSubmission(BaseModel):
+    student_register_number: str = Field(..., description="Student who submitted these answers.")
+    answers: List[Optional[int]] = Field(..., description="Chosen option index per question; null when unanswered.")
+
+class BatchEvaluateQuizInput(BaseModel):
+    quiz_id: Optional[str] = Field(None, description="Quiz returned by /quiz/generate whose answer key is used.")
+    answer_key: Optional[List[int]] = Field(None, description="Correct option index per question, used when no quiz_id is given.")
+    submissions: List[BatchSubmission] = Field(..., min_length=1)
+    persist: bool = Field(False, description="Record every student's result in the quiz history.")
+    time_taken: str = Field("N/A", description="Time recorded with each persisted result.")
+    subject: str = Field("General Quiz", description="Subject recorded with each persisted result.")
+
+class BatchStudentScore(BaseModel):
+    student_register_number: str
+    correct: int
+    score: int = Field(..., ge=0, le=100)
+
+class BatchEvaluateQuizOutput(BaseModel):
+    scores: List[BatchStudentScore]
+    question_correct_rates: List[float] = Field(..., description="Share of students who answered each question correctly.")
+    average_score: float
+    recorded: int = Field(0, description="Number of results saved to the quiz history.")
+
 class MCQQuestion(BaseModel):
     type: Literal["mcq"] = "mcq"
     question: str
@@ -26,10 +58,19 @@ class CodingQuestion(BaseModel):
     type: Literal["coding"] = "coding"
     question: str
 
+class MCQQuestionView(BaseModel):
+    """An MCQ as sent to the client, without its answer"""
+    type: Literal["mcq"] = "mcq"
+    question: str
+    options: List[str]
+
 QuizQuestion = Union[MCQQuestion, CodingQuestion]
+QuizQuestionView = Union[MCQQuestionView, CodingQuestion]
 
 class GeneratePersonalizedQuizInput(BaseModel):
     studyLog: str = Field(..., description='The study log to generate a quiz from.')
+    student_register_number: Optional[str] = Field(None, description="Student requesting the quiz; used to avoid repeating questions they have already seen.")
 
 class GeneratePersonalizedQuizOutput(BaseModel):
-    questions: List[QuizQuestion]
+    questions: List[QuizQuestionView]
+    quiz_id: str = Field(..., description="Pass to /quiz/evaluate or /quiz/submit together with the answers.")
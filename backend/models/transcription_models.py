@@ -1,10 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class TranscriptionEvaluationInput(BaseModel):
     """Input model for transcription evaluation"""
     audioData: str = Field(..., description="Base64 encoded audio data")
     format: str = Field(default="webm", description="Audio format (webm, mp3, wav, etc.)")
+    student_register_number: Optional[str] = Field(default=None, description="Student whose locale history orders the recognition attempts")
+    engine: Optional[str] = Field(default=None, description="ASR engine (google, sphinx, stub); the server default when omitted")
 
 class TextEvaluationInput(BaseModel):
     """Input model for text-only evaluation (faster, no audio processing)"""
@@ -20,6 +22,16 @@ class TranscriptionEvaluationOutput(BaseModel):
     suggestions: Optional[str] = Field(None, description="Suggestions for improvement")
     analysis: Optional[Dict[str, Any]] = Field(None, description="Detailed analysis data")
 
+class TranscriptionJobStatus(BaseModel):
+    """Status of a background transcription job"""
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="queued, running, completed or failed")
+    stage: str = Field(..., description="Latest pipeline stage reached")
+    events: List[Dict[str, Any]] = Field(default_factory=list, description="Stage events so far, oldest first")
+    queue_position: Optional[int] = Field(None, description="Position in the queue while waiting")
+    result: Optional[TranscriptionEvaluationOutput] = Field(None, description="Evaluation once completed")
+    error: Optional[str] = Field(None, description="Failure reason")
+
 class CommunicationHistoryInput(BaseModel):
     """Input model for saving communication history"""
     student_register_number: str = Field(..., description="Student register number")
@@ -0,0 +1,125 @@
+# Rate limiting, circuit breaking and backoff for upstream AI calls
+import asyncio
+import random
+import time
+from typing import Any, Dict
+
+from google.api_core import exceptions as google_exceptions
+
+# Upstream says "slow down": shrink the request rate
+QUOTA_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+# The request ran out of time (our client-side timeout or the server's)
+DEADLINE_ERRORS = (google_exceptions.DeadlineExceeded, TimeoutError)
+# Upstream is unhealthy or slow: count towards opening the circuit
+UPSTREAM_ERRORS = QUOTA_ERRORS + (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    TimeoutError,
+)
+
+class AIUnavailableError(RuntimeError):
+    """The AI upstream cannot take the call right now; callers should fail fast rather than retry"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class AdaptiveTokenBucket:
+    """Token bucket matched to the project quota, with AIMD rate adaptation.
+
+    Callers reserve a token up front (the balance may go negative) and sleep
+    until it matures, which keeps waiting callers in FIFO order. A quota error
+    halves the refill rate; every success restores 5% of the configured rate.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.max_rate = requests_per_minute / 60.0
+        self.min_rate = self.max_rate / 8
+        self.rate = self.max_rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float):
+        """Wait for a token, or raise AIUnavailableError if that would take longer than ``max_wait``"""
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            raise AIUnavailableError("AI request rate limit reached, please try again shortly.", retry_after=wait)
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+
+    def on_quota_error(self):
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "requests_per_minute": round(self.rate * 60, 2),
+            "max_requests_per_minute": round(self.max_rate * 60, 2),
+            "tokens": round(self.tokens, 2),
+        }
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive upstream failures and fails
+    fast for ``reset_timeout`` seconds, then lets a single probe through."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise AIUnavailableError("AI service is temporarily unavailable, please try again shortly.", retry_after=remaining)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise AIUnavailableError("AI service is recovering, please try again shortly.", retry_after=1.0)
+            self._probe_in_flight = True
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def on_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"⚠️ AI circuit breaker opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def on_neutral(self):
+        """The call finished with an error that says nothing about upstream health"""
+        self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
@@ -1,7 +1,21 @@
 # AI-related functions
 import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Type, TypeVar
+import anyio
+from pydantic import BaseModel
 from dotenv import load_dotenv
 import google.generativeai as genai
+from services.single_flight import SingleFlight
+from services.request_hedging import RequestHedger
+from services.structured_output import list_model, parse_items, parse_response, response_schema
+from services.ai_resilience import (
+    DEADLINE_ERRORS, QUOTA_ERRORS, UPSTREAM_ERRORS, AIUnavailableError, AdaptiveTokenBucket, CircuitBreaker,
+)
 
 load_dotenv()
 
@@ -16,3 +30,177 @@ _model = genai.GenerativeModel('gemini-1.5-flash')
 
 def get_ai_model():
     return _model
+
+# Identical prompts issued concurrently (e.g. a whole class generating the
+# same coding set) share one model call
+_single_flight = SingleFlight()
+
+# Requests are paced to the project quota (free tier: 15 RPM), at most
+# AI_MAX_CONCURRENCY model calls hold a worker thread, and a run of upstream
+# failures opens the circuit so callers fail fast instead of queueing
+_rate_limiter = AdaptiveTokenBucket(
+    requests_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+    burst=int(os.getenv("GEMINI_BURST", "5")),
+)
+_circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+_thread_limiter = anyio.CapacityLimiter(int(os.getenv("AI_MAX_CONCURRENCY", "8")))
+
+# Seconds an endpoint's model work may take end to end, including rate-limit
+# waits and any retries made inside ``endpoint_deadline``
+ENDPOINT_DEADLINES = {
+    "quiz_generate": 45.0,
+    "coding_generate": 30.0,
+    "coding_evaluate": 20.0,
+    "default": 30.0,
+}
+
+# Absolute (time.monotonic) deadline shared by the calls of one operation
+_deadline: ContextVar[Optional[float]] = ContextVar("ai_deadline", default=None)
+
+@contextmanager
+def endpoint_deadline(endpoint: str):
+    """Make every model call inside the block, retries included, share one endpoint deadline"""
+    limit = time.monotonic() + ENDPOINT_DEADLINES.get(endpoint, ENDPOINT_DEADLINES["default"])
+    current = _deadline.get()
+    token = _deadline.set(limit if current is None else min(current, limit))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def _deadline_for(endpoint: str) -> float:
+    return _deadline.get() or time.monotonic() + ENDPOINT_DEADLINES.get(endpoint, ENDPOINT_DEADLINES["default"])
+
+# Slow calls on these endpoints race a duplicate request (set to "" to disable)
+_hedger = RequestHedger(filter(None, os.getenv("AI_HEDGED_ENDPOINTS", "quiz_generate,coding_evaluate").split(",")))
+
+async def _call_model(prompt_text: str, endpoint: str, generation_config: dict = None,
+                      deadline_at: float = None, rate_wait: float = None) -> str:
+    if deadline_at is None:
+        deadline_at = _deadline_for(endpoint)
+    started = time.monotonic()
+    _circuit_breaker.before_call()
+
+    def _task():
+        # A worker thread cannot be interrupted, so the deadline is enforced by the
+        # client's own request timeout: whatever is left once the thread starts
+        timeout = deadline_at - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError("deadline passed before the request was sent")
+        sent = time.monotonic()
+        resp = _model.generate_content(prompt_text, generation_config=dict(generation_config or {}),
+                                       request_options={"timeout": timeout})
+        return (getattr(resp, "text", "") or "").strip(), time.monotonic() - sent
+
+    deadline = deadline_at - started
+    try:
+        if deadline <= 0:
+            raise TimeoutError("deadline already passed")
+        await _rate_limiter.acquire(max_wait=deadline if rate_wait is None else min(rate_wait, deadline))
+        text, latency = await anyio.to_thread.run_sync(_task, limiter=_thread_limiter)
+    except AIUnavailableError:
+        _circuit_breaker.on_neutral()
+        raise
+    except QUOTA_ERRORS as e:
+        _rate_limiter.on_quota_error()
+        _circuit_breaker.on_failure()
+        raise AIUnavailableError(f"AI quota exceeded, please try again shortly. ({e})", retry_after=10.0) from e
+    except DEADLINE_ERRORS as e:
+        _circuit_breaker.on_failure()
+        raise AIUnavailableError(f"AI request exceeded the {endpoint} deadline.", retry_after=5.0) from e
+    except UPSTREAM_ERRORS:
+        _circuit_breaker.on_failure()
+        raise
+    except BaseException:
+        _circuit_breaker.on_neutral()
+        raise
+
+    _rate_limiter.on_success()
+    _circuit_breaker.on_success()
+    # Upstream time only: rate-limiter and thread-pool waits would inflate the hedge delay
+    _hedger.record_latency(endpoint, latency)
+    return text
+
+async def _hedged_call(prompt_text: str, endpoint: str, generation_config: dict = None) -> str:
+    deadline_at = _deadline_for(endpoint)
+
+    def _call(hedge: bool):
+        # The hedge shares the original deadline and never waits for a rate-limit token
+        return _call_model(prompt_text, endpoint, generation_config, deadline_at, rate_wait=0.0 if hedge else None)
+
+    return await _hedger.run(endpoint, _call, can_hedge=lambda: _circuit_breaker.state == CircuitBreaker.CLOSED)
+
+async def generate_text(prompt_text: str, endpoint: str = "default", generation_config: dict = None) -> str:
+    """Call the model off the event loop and return the stripped response text.
+
+    Raises AIUnavailableError when the call is rejected by the rate limiter or
+    circuit breaker, hits a quota error or misses the endpoint deadline;
+    callers should surface that rather than retry.
+    """
+    config = json.dumps(generation_config, sort_keys=True) if generation_config else ""
+    key = hashlib.sha256(f"{endpoint}\n{config}\n{prompt_text}".encode("utf-8")).hexdigest()
+    return await _single_flight.do(key, lambda: _hedged_call(prompt_text, endpoint, generation_config), label=endpoint)
+
+# Responses that failed to parse or validate, per endpoint
+_parse_stats = {}
+_schemas = {}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+async def generate_json(prompt_text: str, model_cls: Type[ModelT], endpoint: str = "default") -> ModelT:
+    """Ask for JSON constrained to ``model_cls``'s schema and return the validated model.
+
+    Raises ValueError if the response still fails to parse or validate.
+    """
+    if model_cls not in _schemas:
+        _schemas[model_cls] = response_schema(model_cls)
+    generation_config = {"response_mime_type": "application/json", "response_schema": _schemas[model_cls]}
+
+    text = await generate_text(prompt_text, endpoint=endpoint, generation_config=generation_config)
+    stats = _parse_stats.setdefault(endpoint, {"responses": 0, "parse_failures": 0})
+    stats["responses"] += 1
+    try:
+        return parse_response(text, model_cls)
+    except ValueError as e:  # JSONDecodeError and ValidationError are both ValueErrors
+        stats["parse_failures"] += 1
+        print(f"⚠️ Unparseable structured response from {endpoint}: {e}")
+        raise ValueError(f"AI response did not match the expected format: {e}")
+
+async def generate_json_items(prompt_text: str, item_cls: Type[ModelT], endpoint: str = "default",
+                              salvage: Callable[[Any], Optional[ModelT]] = None) -> List[ModelT]:
+    """Ask for ``{"questions": [item_cls, ...]}`` and validate item by item.
+
+    Malformed items are salvaged or dropped (and counted) instead of failing
+    the batch; raises ValueError only if the response is unusable as a whole.
+    """
+    wrapper = list_model(item_cls)
+    if wrapper not in _schemas:
+        _schemas[wrapper] = response_schema(wrapper)
+    generation_config = {"response_mime_type": "application/json", "response_schema": _schemas[wrapper]}
+
+    text = await generate_text(prompt_text, endpoint=endpoint, generation_config=generation_config)
+    stats = _parse_stats.setdefault(endpoint, {"responses": 0, "parse_failures": 0})
+    stats["responses"] += 1
+    try:
+        items, dropped = parse_items(text, item_cls, salvage=salvage)
+    except ValueError as e:
+        stats["parse_failures"] += 1
+        print(f"⚠️ Unparseable structured response from {endpoint}: {e}")
+        raise ValueError(f"AI response did not match the expected format: {e}")
+    if dropped:
+        stats["dropped_items"] = stats.get("dropped_items", 0) + dropped
+        print(f"⚠️ Dropped {dropped} malformed item(s) from {endpoint}")
+    return items
+
+def get_ai_metrics() -> dict:
+    return {
+        "single_flight": _single_flight.get_stats(),
+        "rate_limiter": _rate_limiter.get_stats(),
+        "circuit_breaker": _circuit_breaker.get_stats(),
+        "hedging": _hedger.get_stats(),
+        "structured_output": {
+            endpoint: {**stats, "failure_rate": round(stats["parse_failures"] / stats["responses"], 3) if stats["responses"] else 0.0}
+            for endpoint, stats in _parse_stats.items()
+        },
+        "threads": {"busy": _thread_limiter.borrowed_tokens, "limit": _thread_limiter.total_tokens},
+    }
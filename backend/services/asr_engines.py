@@ -0,0 +1,98 @@
+# Speech recognition engines the transcription pipeline can run on
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import speech_recognition as sr
+
+DEFAULT_ENGINE = os.getenv("TRANSCRIPTION_ENGINE", "google")
+STUB_TEXT = os.getenv("TRANSCRIPTION_STUB_TEXT",
+                      "Hello, my name is Alex and I am practising my communication skills for the interview.")
+
+class UnknownASREngineError(ValueError):
+    """The requested engine does not exist or cannot run in this deployment"""
+
+class ASREngine(ABC):
+    """One recognition backend.
+
+    ``alternatives`` returns candidate transcripts for the clip, best first,
+    and raises sr.UnknownValueError when nothing was heard or sr.RequestError
+    when the engine itself failed. ``locales`` lists the languages the engine
+    can recognise (None for any); ``multilingual`` engines are raced across
+    locales and feed the per-student locale history.
+    """
+
+    name = ""
+    label = ""
+    locales: Optional[List[str]] = None
+    multilingual = False
+    offline = False
+
+    def available(self) -> bool:
+        return True
+
+    def supported(self, locales: List[str]) -> List[str]:
+        """The requested locales this engine can handle, in order"""
+        if self.locales is None:
+            return list(locales)
+        return [locale for locale in locales if locale in self.locales] or self.locales[:1]
+
+    @abstractmethod
+    def alternatives(self, recognizer: sr.Recognizer, audio_data: sr.AudioData, language: str) -> List[str]:
+        """Candidate transcripts, best first"""
+
+class GoogleEngine(ASREngine):
+    """Google Web Speech API: accurate, but networked and rate-limited"""
+
+    name = "google"
+    label = "Google Speech Recognition"
+    multilingual = True
+
+    def alternatives(self, recognizer, audio_data, language):
+        # show_all returns every alternative, so a noisy top hypothesis need not cost another request
+        result = recognizer.recognize_google(audio_data, language=language, show_all=True)
+        if not isinstance(result, dict):
+            return []
+        return [a.get("transcript") for a in result.get("alternative", []) if a.get("transcript")]
+
+class SphinxEngine(ASREngine):
+    """CMU PocketSphinx on the local CPU: no network or quota, predictable latency, lower accuracy"""
+
+    name = "sphinx"
+    label = "PocketSphinx"
+    locales = ["en-US"]  # the only model bundled with the pocketsphinx package
+    offline = True
+
+    def available(self):
+        return importlib.util.find_spec("pocketsphinx") is not None
+
+    def alternatives(self, recognizer, audio_data, language):
+        return [recognizer.recognize_sphinx(audio_data, language=language)]
+
+class StubEngine(ASREngine):
+    """Deterministic transcript for tests and demos; never touches the audio content"""
+
+    name = "stub"
+    label = "Stub recognizer"
+    offline = True
+
+    def alternatives(self, recognizer, audio_data, language):
+        return [STUB_TEXT]
+
+ENGINES: Dict[str, ASREngine] = {engine.name: engine for engine in (GoogleEngine(), SphinxEngine(), StubEngine())}
+
+def get_engine(name: Optional[str] = None) -> ASREngine:
+    """Engine by name (the deployment default when omitted)"""
+    key = (name or DEFAULT_ENGINE).lower().strip()
+    engine = ENGINES.get(key)
+    if engine is None:
+        raise UnknownASREngineError(f"Unknown transcription engine '{key}'. Choose one of: {', '.join(ENGINES)}")
+    if not engine.available():
+        raise UnknownASREngineError(f"Transcription engine '{key}' is not installed on this server")
+    return engine
+
+def list_engines() -> List[Dict[str, object]]:
+    """Engines with their capabilities, for the API"""
+    return [{"name": e.name, "label": e.label, "available": e.available(), "offline": e.offline,
+             "locales": e.locales, "default": e.name == DEFAULT_ENGINE} for e in ENGINES.values()]
@@ -0,0 +1,156 @@
+# Turns uploaded audio bytes into PCM in memory, without touching disk
+import io
+import shutil
+import subprocess
+import threading
+import wave
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import speech_recognition as sr
+
+from services import audio_dsp
+
+TARGET_RATE = 16000
+FFMPEG_TIMEOUT = 30
+
+# ffmpeg demuxer names for the formats browsers record in
+_FFMPEG_FORMATS = {"webm": "webm", "ogg": "ogg", "mp4": "mp4", "m4a": "mp4", "mpeg": "mp3", "mp3": "mp3",
+                   "wav": "wav", "flac": "flac", "aiff": "aiff"}
+
+class AudioDecodeError(RuntimeError):
+    """The audio could not be decoded to PCM"""
+
+class PCMAudio(NamedTuple):
+    frames: bytes
+    sample_rate: int = TARGET_RATE
+    sample_width: int = 2
+    channels: int = 1
+
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / (self.sample_rate * self.sample_width * self.channels)
+
+def detect_format(audio_bytes: bytes) -> Optional[str]:
+    """Container format from the file's magic bytes, or None if unrecognised"""
+    head = audio_bytes[:12]
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":  # EBML: WebM / Matroska
+        return "webm"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head[:4] == b"FORM" and head[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+@lru_cache(maxsize=1)
+def ffmpeg_available() -> bool:
+    """Probe for a working ffmpeg once per process"""
+    if shutil.which("ffmpeg") is None:
+        return False
+    try:
+        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, timeout=10)
+        return True
+    except (subprocess.SubprocessError, OSError):
+        return False
+
+def pcm_to_wav(pcm: PCMAudio) -> bytes:
+    """Wrap PCM frames in a WAV header"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(pcm.channels)
+        wav.setsampwidth(pcm.sample_width)
+        wav.setframerate(pcm.sample_rate)
+        wav.writeframes(pcm.frames)
+    return buffer.getvalue()
+
+def conform(pcm: PCMAudio) -> PCMAudio:
+    """16 kHz mono 16-bit copy of ``pcm`` (returned as-is when it already is)"""
+    if (pcm.sample_rate, pcm.sample_width, pcm.channels) == (TARGET_RATE, 2, 1):
+        return pcm
+    samples = audio_dsp.to_float(pcm.frames, pcm.sample_width, pcm.channels)
+    return PCMAudio(audio_dsp.to_int16(audio_dsp.resample(samples, pcm.sample_rate, TARGET_RATE)))
+
+def _read_wav(audio_bytes: bytes) -> Optional[PCMAudio]:
+    """Mono 16-bit WAV read directly; other layouts return None and are converted elsewhere"""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                return None
+            return PCMAudio(wav.readframes(wav.getnframes()), wav.getframerate())
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"invalid WAV data: {e}") from e
+
+def _ffmpeg_decode(audio_bytes: bytes, audio_format: Optional[str]) -> PCMAudio:
+    """Pipe the upload through ffmpeg (stdin to stdout) as 16 kHz mono s16le"""
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    demuxer = _FFMPEG_FORMATS.get((audio_format or "").lower())
+    if demuxer:
+        command += ["-f", demuxer]
+    command += ["-i", "pipe:0", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(TARGET_RATE), "pipe:1"]
+    try:
+        result = subprocess.run(command, input=audio_bytes, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg not available") from e
+    except subprocess.TimeoutExpired as e:
+        raise AudioDecodeError(f"ffmpeg timed out after {FFMPEG_TIMEOUT}s") from e
+    if result.returncode != 0 or not result.stdout:
+        message = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise AudioDecodeError(f"ffmpeg failed: {message[-1] if message else 'no audio decoded'}")
+    return PCMAudio(result.stdout)
+
+def _speech_recognition_decode(audio_bytes: bytes) -> PCMAudio:
+    """WAV/AIFF/FLAC via SpeechRecognition's reader, which also downmixes to mono"""
+    try:
+        with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+            audio = sr.Recognizer().record(source)
+    except (ValueError, AssertionError, OSError) as e:
+        raise AudioDecodeError(f"unreadable audio: {e}") from e
+    return PCMAudio(audio.frame_data, audio.sample_rate, audio.sample_width)
+
+def decode_to_pcm(audio_bytes: bytes, audio_format: Optional[str] = None) -> PCMAudio:
+    """Decode an upload to mono PCM, trusting the magic bytes over the declared format.
+    Browsers' mono 16-bit WAV is read directly, compressed formats go through
+    ffmpeg, and WAV/AIFF/FLAC still decode when ffmpeg is missing. The result
+    is always 16 kHz mono 16-bit."""
+    detected = detect_format(audio_bytes) or audio_format
+    if detected == "wav":
+        pcm = _read_wav(audio_bytes)
+        if pcm is not None:
+            return conform(pcm)
+    if ffmpeg_available():
+        return _ffmpeg_decode(audio_bytes, detected)
+    if detected in ("wav", "aiff", "flac"):
+        return conform(_speech_recognition_decode(audio_bytes))
+    raise AudioDecodeError(f"ffmpeg not available to decode {detected or 'unknown'} audio")
+
+class EncodedAudioData(sr.AudioData):
+    """AudioData that encodes to FLAC once and reuses it for every recognition request.
+
+    ``recognize_google`` re-encodes its input on each call by spawning the
+    FLAC encoder; repeated requests on the same clip (other locales, other
+    engines) now share one encoding, even when they run in parallel threads.
+    """
+
+    def __init__(self, frame_data, sample_rate, sample_width):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self._flac_cache = {}
+        self._flac_lock = threading.Lock()
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        key = (convert_rate, convert_width)
+        with self._flac_lock:
+            if key not in self._flac_cache:
+                self._flac_cache[key] = super().get_flac_data(convert_rate, convert_width)
+            return self._flac_cache[key]
+
+def to_audio_data(pcm: PCMAudio) -> EncodedAudioData:
+    """Recognizer input built straight from the PCM buffer"""
+    return EncodedAudioData(pcm.frames, pcm.sample_rate, pcm.sample_width)
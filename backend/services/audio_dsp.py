@@ -0,0 +1,74 @@
+# Vectorised NumPy gain, high-pass filtering and resampling for speech clips
+import numpy as np
+
+# Order of the Butterworth-shaped high-pass response
+HIGH_PASS_ORDER = 2
+
+def to_float(frames: bytes, sample_width: int = 2, channels: int = 1) -> np.ndarray:
+    """Little-endian PCM bytes as mono float32 in [-1, 1]"""
+    usable = len(frames) - len(frames) % (sample_width * channels)
+    raw = np.frombuffer(frames[:usable], dtype=np.uint8)
+    if sample_width == 1:
+        samples = (raw.astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = raw.view("<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        # Sign-extend 24-bit samples into int32
+        padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = raw.reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2147483648
+    elif sample_width == 4:
+        samples = raw.view("<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported sample width: {sample_width}")
+    if channels > 1:
+        # Strided sums are much faster than mean(axis=1) over a (frames, channels) view
+        samples = sum(samples[c::channels] for c in range(channels)) / np.float32(channels)
+    return samples
+
+def to_int16(samples: np.ndarray) -> bytes:
+    """Float samples as 16-bit PCM bytes, clipped rather than wrapped"""
+    return (np.clip(samples, -1.0, 32767 / 32768) * 32768).astype("<i2").tobytes()
+
+def level_dbfs(samples: np.ndarray) -> float:
+    """RMS level of the clip in dBFS (-inf for silence)"""
+    if samples.size == 0:
+        return float("-inf")
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    return 20 * np.log10(rms) if rms > 0 else float("-inf")
+
+def apply_gain(samples: np.ndarray, gain_db: float) -> np.ndarray:
+    return samples * np.float32(10 ** (gain_db / 20))
+
+def normalise(samples: np.ndarray, target_dbfs: float = -20.0, max_gain_db: float = 20.0) -> np.ndarray:
+    """Bring the clip's RMS level to ``target_dbfs``, boosting by at most ``max_gain_db``
+    and never so far that the peak clips"""
+    level = level_dbfs(samples)
+    if level == float("-inf"):
+        return samples
+    peak = float(np.max(np.abs(samples)))
+    headroom_db = -20 * np.log10(peak) if peak > 0 else max_gain_db
+    return apply_gain(samples, min(target_dbfs - level, max_gain_db, headroom_db))
+
+def high_pass(samples: np.ndarray, sample_rate: int, cutoff_hz: float) -> np.ndarray:
+    """Zero-phase high-pass in the frequency domain with a Butterworth magnitude response,
+    so rumble below ``cutoff_hz`` is removed without a sample-by-sample filter loop"""
+    if samples.size == 0:
+        return samples
+    spectrum = np.fft.rfft(samples)
+    freqs = np.fft.rfftfreq(samples.size, d=1 / sample_rate)
+    with np.errstate(divide="ignore"):
+        response = 1 / np.sqrt(1 + (cutoff_hz / freqs) ** (2 * HIGH_PASS_ORDER))
+    response[0] = 0.0  # also drops any DC offset
+    return np.fft.irfft(spectrum * response, n=samples.size).astype(np.float32)
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    """Band-limited resampling by truncating or zero-padding the spectrum"""
+    if sample_rate == target_rate or samples.size == 0:
+        return samples
+    target_length = max(1, int(round(samples.size * target_rate / sample_rate)))
+    spectrum = np.fft.rfft(samples)
+    resized = np.zeros(target_length // 2 + 1, dtype=spectrum.dtype)
+    keep = min(resized.size, spectrum.size)
+    resized[:keep] = spectrum[:keep]
+    return (np.fft.irfft(resized, n=target_length) * (target_length / samples.size)).astype(np.float32)
@@ -0,0 +1,80 @@
+# Reads binary audio uploads (multipart or raw request body) with bounded memory
+import os
+from typing import AsyncIterator, NamedTuple, Optional
+
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+MAX_UPLOAD_BYTES = int(os.getenv("AUDIO_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+
+class UploadTooLargeError(ValueError):
+    """The upload exceeds MAX_UPLOAD_BYTES"""
+
+class AudioUpload(NamedTuple):
+    audio_bytes: bytes
+    audio_format: str
+    student_register_number: Optional[str] = None
+    engine: Optional[str] = None
+
+def _too_large(max_bytes: int) -> UploadTooLargeError:
+    return UploadTooLargeError(f"Audio upload exceeds {max_bytes // (1024 * 1024)} MB")
+
+async def capped(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Pass ``chunks`` through, raising as soon as more than ``max_bytes`` have arrived"""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+
+async def spool(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> bytes:
+    """Collect an upload as it arrives into one buffer, never holding more than ``max_bytes``"""
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    buffer = bytearray()
+    async for chunk in capped(chunks, max_bytes):
+        buffer += chunk
+    return bytes(buffer)
+
+async def _file_chunks(upload) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+async def read_audio_request(request: Request) -> AudioUpload:
+    """Audio bytes and format from a multipart form (``audio`` file, optional
+    ``format``, ``student_register_number`` and ``engine`` fields) or from a raw
+    body whose Content-Type is the format (the rest from the query string)"""
+    content_type = request.headers.get("content-type", "")
+    multipart = content_type.startswith("multipart/form-data")
+    max_body = MAX_UPLOAD_BYTES + CHUNK_BYTES if multipart else MAX_UPLOAD_BYTES  # allow for multipart framing
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_body:
+        raise _too_large(MAX_UPLOAD_BYTES)
+
+    if multipart:
+        # Parsed from a capped stream: request.form() would take in the whole body before any
+        # size check when there is no Content-Length (chunked uploads)
+        try:
+            form = await MultiPartParser(request.headers, capped(request.stream(), max_body), max_files=1).parse()
+        except MultiPartException as e:
+            raise ValueError(f"Invalid multipart upload: {e.message}")
+        try:
+            upload = form.get("audio")
+            if upload is None or not hasattr(upload, "read"):
+                raise ValueError("Multipart upload must include an 'audio' file")
+            audio_format = form.get("format") or upload.content_type or "webm"
+            student = form.get("student_register_number") or request.query_params.get("student_register_number")
+            engine = form.get("engine") or request.query_params.get("engine")
+            return AudioUpload(await spool(_file_chunks(upload)), audio_format, student, engine)
+        finally:
+            await form.close()
+
+    audio_format = request.query_params.get("format") or content_type or "webm"
+    if audio_format == "application/octet-stream":
+        audio_format = "webm"
+    return AudioUpload(await spool(request.stream()), audio_format,
+                       request.query_params.get("student_register_number"), request.query_params.get("engine"))
@@ -69,6 +69,13 @@ class AuthService:
                 return user
         return None
     
+    def get_register_number(self, user_id: str) -> Optional[str]:
+        """Register number (username) of the student with this user ID, if any"""
+        for user in self._load_users():
+            if user.get("user_id") == user_id and user.get("user_type") == "student":
+                return user.get("username")
+        return None
+    
     async def authenticate_user(self, login_input: LoginInput) -> LoginOutput:
         """Authenticate user login"""
         try:
@@ -0,0 +1,82 @@
+# Incremental BM25 index for matching study logs against stored questions
+import math
+from collections import Counter
+from typing import Dict, Hashable, List, Tuple
+
+from services.study_log_condenser import content_words
+
+class BM25Index:
+    """Inverted index scored with Okapi BM25.
+
+    Documents can be added and removed one at a time; document frequencies
+    and the average length are kept up to date so nothing is ever rebuilt.
+    Besides the BM25 rank, ``search`` reports each hit's coverage: the
+    IDF-weighted share of the document's terms that appear in the query,
+    which is comparable across queries and is what relevance thresholds
+    should be applied to.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: Hashable, text: str):
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+        terms = Counter(content_words(text))
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: Hashable):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._doc_terms) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Hashable, float, float, int]]:
+        """Best ``limit`` documents for ``query`` as (doc_id, bm25_score, coverage, matched_terms)"""
+        if not self._doc_terms:
+            return []
+        query_terms = set(content_words(query))
+        avg_length = self._total_length / len(self._doc_terms) or 1.0
+        idf = {term: self.idf(term) for term in query_terms if term in self._postings}
+
+        scores: Dict[Hashable, float] = {}
+        for term, term_idf in idf.items():
+            for doc_id, tf in self._postings[term].items():
+                length = self._doc_lengths[doc_id]
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_idf * norm
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        results = []
+        for doc_id, score in ranked:
+            doc_terms = self._doc_terms[doc_id]
+            total = sum(self.idf(term) for term in doc_terms)
+            matched = [term for term in doc_terms if term in idf]
+            coverage = sum(idf[term] for term in matched) / total if total else 0.0
+            results.append((doc_id, score, coverage, len(matched)))
+        return results
@@ -0,0 +1,244 @@
+# Local, resource-limited execution of student code against cached test cases
+import ast
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import anyio
+
+# Runs inside the child interpreter. Before any submitted code runs it:
+#   1. (when started as root in fresh namespaces) builds a read-only chroot holding
+#      only the Python installation and system libraries, then drops to nobody;
+#   2. lowers its resource limits, including NPROC=0 so it cannot fork;
+#   3. installs a seccomp filter refusing sockets, exec, ptrace, mounts and
+#      namespace changes.
+# Student output is captured; only pass/fail flags and exception type names
+# are reported, never values the submission produced.
+_RUNNER = r'''
+READY_MARKER = "sandbox-ready\n"
+import ctypes, io, json, os, platform, resource, struct, sys
+
+payload = json.loads(sys.stdin.read())
+libc = ctypes.CDLL(None, use_errno=True)
+
+def _check(result, what):
+    if result != 0:
+        raise OSError(ctypes.get_errno(), f"{what} failed")
+
+def _enter_jail(jail):
+    MS_RDONLY, MS_NOSUID, MS_NODEV, MS_REMOUNT, MS_BIND, MS_REC = 1, 2, 4, 32, 4096, 16384
+    root = jail["root"]
+    _check(libc.mount(b"tmpfs", root.encode(), b"tmpfs", MS_NOSUID | MS_NODEV, b"size=1m,mode=755"), "mount tmpfs")
+    for path in jail["binds"]:
+        target = root + path
+        os.makedirs(target, exist_ok=True)
+        _check(libc.mount(path.encode(), target.encode(), None, MS_BIND | MS_REC, None), f"bind {path}")
+        _check(libc.mount(None, target.encode(), None, MS_REMOUNT | MS_BIND | MS_RDONLY | MS_NOSUID | MS_NODEV, None),
+               f"remount {path} read-only")
+    os.makedirs(root + "/tmp", exist_ok=True)
+    os.chroot(root)
+    os.chdir("/tmp")
+    os.setgroups([])
+    os.setgid(jail["uid"])
+    os.setuid(jail["uid"])
+
+def _limit(limits):
+    for name, value in limits.items():
+        resource.setrlimit(getattr(resource, name), (value, value))
+
+def _install_seccomp():
+    # socket/bind/listen/accept/connect, fork/vfork/exec, ptrace, mounts, chroot, modules, keys, namespaces, bpf
+    arch = {"x86_64": (0xC000003E, [41, 42, 43, 49, 50, 57, 58, 59, 101, 155, 161, 165, 166, 175, 176, 246, 248,
+                                    249, 250, 272, 298, 308, 313, 321, 322]),
+            "aarch64": (0xC00000B7, [198, 200, 201, 202, 203, 221, 117, 41, 51, 40, 39, 105, 106, 104, 217, 218, 219,
+                                     97, 241, 268, 273, 280, 281])}.get(platform.machine())
+    if arch is None:
+        raise OSError("seccomp filter not defined for this architecture")
+    audit_arch, denied = arch
+    LD_ABS_W, JEQ, JGE, RET = 0x20, 0x15, 0x35, 0x06
+    KILL, ALLOW, EPERM = 0x80000000, 0x7FFF0000, 0x00050000 | 1
+    program = [(LD_ABS_W, 0, 0, 4), (JEQ, 1, 0, audit_arch), (RET, 0, 0, KILL), (LD_ABS_W, 0, 0, 0)]
+    if audit_arch == 0xC000003E:
+        program += [(JGE, 0, 1, 0x40000000), (RET, 0, 0, EPERM)]  # x32 ABI numbers
+    for number in denied:
+        program += [(JEQ, 0, 1, number), (RET, 0, 0, EPERM)]
+    program.append((RET, 0, 0, ALLOW))
+    filters = ctypes.create_string_buffer(b"".join(struct.pack("HBBI", *op) for op in program))
+    fprog = struct.pack("HP", len(program), ctypes.addressof(filters))
+    PR_SET_NO_NEW_PRIVS, PR_SET_SECCOMP, SECCOMP_MODE_FILTER = 38, 22, 2
+    _check(libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), "no_new_privs")
+    _check(libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, ctypes.c_char_p(fprog), 0, 0), "seccomp")
+
+def _report(data):
+    sys.__stdout__.write(json.dumps(data))
+    sys.__stdout__.flush()
+
+try:
+    if payload.get("jail"):
+        _enter_jail(payload["jail"])
+    _limit(payload["limits"])
+    _install_seccomp()
+except BaseException as e:
+    _report({"unavailable": f"{type(e).__name__}: {e}"})
+    sys.exit(0)
+# Tells the parent that isolation is in place, so a later silent death is the submission's doing
+sys.__stderr__.write(READY_MARKER)
+sys.__stderr__.flush()
+
+sys.stdout = sys.stderr = io.StringIO()
+namespace = {"__name__": "__submission__"}
+try:
+    exec(compile(payload["code"], "<submission>", "exec"), namespace)
+except BaseException as e:
+    _report({"error": type(e).__name__})
+    sys.exit(0)
+
+func = namespace.get(payload["function_name"])
+if not callable(func):
+    _report({"missing_function": payload["function_name"]})
+    sys.exit(0)
+
+results = []
+for case in payload["test_cases"]:
+    try:
+        actual = json.loads(json.dumps(func(*case["input"]), default=repr))
+        results.append({"passed": actual == case["expected"]})
+    except BaseException as e:
+        results.append({"passed": False, "error": type(e).__name__})
+_report({"results": results})
+'''
+
+def check_syntax(code: str) -> Optional[str]:
+    """Return a readable syntax error for Python code, or None if it parses"""
+    try:
+        ast.parse(code)
+        return None
+    except SyntaxError as e:
+        location = f"line {e.lineno}" if e.lineno else "unknown line"
+        return f"{e.msg} ({location})"
+
+NOBODY_UID = 65534
+# Read-only inside the sandbox: the interpreter and system libraries, nothing from the app
+_SYSTEM_DIRS = ["/usr", "/lib", "/lib64", "/bin"]
+
+@lru_cache(maxsize=1)
+def isolation_mode() -> Optional[str]:
+    """How submissions are isolated here: bubblewrap, util-linux unshare (as root), or None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    if shutil.which("bwrap"):
+        return "bwrap"
+    if os.geteuid() == 0 and shutil.which("unshare"):
+        return "unshare"
+    return None
+
+class CodeSandbox:
+    """Runs submissions in separate, isolated and capped Python processes.
+
+    Each run gets fresh network, PID, IPC and mount namespaces (bubblewrap, or
+    unshare plus a chroot when running as root). The only filesystem it sees is
+    a read-only view of the Python installation and system libraries. It runs
+    as nobody under CPU, memory, file-size and NPROC=0 limits, with a seccomp
+    filter and a wall-clock timeout. Where no isolation mechanism exists the
+    code is not run at all and grading falls back to the model. At most
+    MAX_WORKERS runs execute concurrently.
+    """
+
+    MAX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "4"))
+    CPU_SECONDS = 2
+    MEMORY_BYTES = 256 * 1024 * 1024
+    WALL_CLOCK_SECONDS = 5
+
+    def __init__(self):
+        self._limiter = anyio.CapacityLimiter(self.MAX_WORKERS)
+        self.mode = isolation_mode()
+        if self.mode is None:
+            print("⚠️ No sandbox isolation available (bwrap, or unshare as root); coding answers will be graded by the model")
+
+    def _limits(self) -> Dict[str, int]:
+        return {"RLIMIT_CPU": self.CPU_SECONDS, "RLIMIT_AS": self.MEMORY_BYTES, "RLIMIT_FSIZE": 0,
+                "RLIMIT_NPROC": 0, "RLIMIT_NOFILE": 64, "RLIMIT_CORE": 0}
+
+    def _command(self, payload: Dict[str, Any], workdir: str) -> List[str]:
+        interpreter = [sys.executable, "-I", "-S", "-c", _RUNNER]
+        binds = sorted({sys.base_prefix, os.path.dirname(sys.executable)} | {d for d in _SYSTEM_DIRS if os.path.exists(d)})
+        if self.mode == "bwrap":
+            command = [shutil.which("bwrap"), "--unshare-all", "--die-with-parent", "--new-session", "--clearenv",
+                       "--uid", str(NOBODY_UID), "--gid", str(NOBODY_UID)]
+            for path in binds:
+                command += ["--ro-bind", path, path]
+            return command + ["--tmpfs", "/tmp", "--dev", "/dev", "--chdir", "/tmp", "--"] + interpreter
+        # The runner builds the chroot itself, inside the new mount namespace
+        payload["jail"] = {"root": workdir, "binds": binds, "uid": NOBODY_UID}
+        return [shutil.which("unshare"), "--net", "--ipc", "--uts", "--pid", "--mount", "--fork", "--kill-child",
+                "--"] + interpreter
+
+    def _run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.mode is None:
+            return {"unavailable": "no isolation mechanism"}
+        payload = dict(payload, limits=self._limits())
+        with tempfile.TemporaryDirectory() as workdir:
+            command = self._command(payload, workdir)
+            started = time.monotonic()
+            try:
+                proc = subprocess.run(
+                    command,
+                    input=json.dumps(payload),
+                    capture_output=True,
+                    text=True,
+                    timeout=self.WALL_CLOCK_SECONDS,
+                    cwd=workdir,
+                    env={},
+                )
+            except subprocess.TimeoutExpired:
+                return {"timeout": True}
+        try:
+            return json.loads(proc.stdout)
+        except json.JSONDecodeError:
+            if "sandbox-ready" not in proc.stderr:
+                return {"unavailable": proc.stderr.strip()[-200:] or f"exit status {proc.returncode}"}
+            # Killed by a resource limit before it could report (the namespace wrapper may hide the signal)
+            if proc.returncode in (-signal.SIGXCPU, -signal.SIGKILL) or time.monotonic() - started >= self.CPU_SECONDS:
+                return {"timeout": True}
+            return {"crashed": True, "returncode": proc.returncode}
+
+    async def run_tests(self, code: str, function_name: str, test_cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute ``function_name`` from ``code`` against the test cases.
+
+        The report has ``conclusive`` set only when the tests alone decide the
+        outcome: every case passed, or the code failed while loading. Failing
+        cases may come from a wrong generated test case, so they, like
+        timeouts and sandbox problems, are left for a model review with the
+        report as context. Timeouts and crashes are marked ``transient``, as a
+        less loaded server might not repeat them; a sandbox that cannot start
+        is a property of the host and is not. Reports never contain values the
+        code produced.
+        """
+        payload = {"code": code, "function_name": function_name, "test_cases": test_cases}
+        raw = await anyio.to_thread.run_sync(self._run, payload, limiter=self._limiter)
+
+        total = len(test_cases)
+        report = {"conclusive": False, "passed": 0, "total": total, "results": []}
+        if "results" in raw:
+            passed = sum(1 for r in raw["results"] if r["passed"])
+            return dict(report, conclusive=passed == total, passed=passed, results=raw["results"])
+        if raw.get("unavailable"):
+            print(f"⚠️ Sandbox unavailable: {raw['unavailable']}")
+            return dict(report, error="The automated tests could not be run.")
+        if raw.get("timeout"):
+            return dict(report, error="The code exceeded the time limit.", transient=True)
+        if raw.get("crashed"):
+            return dict(report, error="The code exceeded the sandbox resource limits.", transient=True)
+        if raw.get("error") and raw["error"] not in ("ModuleNotFoundError", "ImportError"):
+            return dict(report, conclusive=True, error=f"Your code raised {raw['error']} while loading.")
+        # Missing function or unavailable library: the tests cannot judge this submission
+        if raw.get("error"):
+            return dict(report, error="The code imports a library that is not available to the tests.")
+        return dict(report, error=f"Function '{function_name}' was not defined.")
@@ -1,68 +1,173 @@
 # Coding service functions
-import json
 import asyncio
-import anyio
-from services.ai_service import get_ai_model
+from typing import Any, List, Tuple
+from services.ai_service import endpoint_deadline, generate_json, generate_json_items
+from services.ai_resilience import AIUnavailableError, backoff_delay
+from services.question_bank_service import QuestionBankService
+from services.seen_questions_service import get_seen_questions_service, question_hash
+from services.near_duplicate_index import NearDuplicateIndex, question_text
+from services.code_sandbox import CodeSandbox, check_syntax
+from services.coding_test_case_service import CodingTestCaseService
+from services.evaluation_cache import EvaluationCache
 from models.coding_models import (
     GenerateCodingPracticeInput,
     GenerateCodingPracticeOutput,
     GeneratedCodingQuestion,
+    CodingQuestionSpec,
     EvaluateCodingPracticeInput,
     EvaluateCodingPracticeOutput,
 )
 
 class CodingService:
+    QUESTIONS_PER_SET = 5
+
     def __init__(self):
-        self.ai_model = get_ai_model()
+        self.question_bank = QuestionBankService(refill_fn=self._generate_for_bank)
+        self.seen_questions = get_seen_questions_service()
+        self.test_cases = CodingTestCaseService()
+        self.sandbox = CodeSandbox()
+        self.evaluation_cache = EvaluationCache()
+
+    async def _call_model(self, prompt_text: str, response_model: Any, endpoint: str = "coding_generate") -> Any:
+        return await generate_json(prompt_text, response_model, endpoint=endpoint)
 
-    async def _call_model(self, prompt_text: str) -> str:
-        def _task():
-            resp = self.ai_model.generate_content(prompt_text)
-            return (getattr(resp, "text", "") or "").strip()
-        return await anyio.to_thread.run_sync(_task)
+    async def _call_model_items(self, prompt_text: str, endpoint: str = "coding_generate") -> List[CodingQuestionSpec]:
+        return await generate_json_items(prompt_text, CodingQuestionSpec, endpoint=endpoint,
+                                         salvage=self._without_test_cases)
 
     @staticmethod
-    def _extract_json(response_text: str) -> dict:
-        text = response_text.strip()
-        if text.startswith("```json"):
-            text = text[7:].strip()
-        elif text.startswith("```"):
-            text = text[3:].strip()
-        if text.endswith("```"):
-            text = text[:-3].strip()
-        try:
-            return json.loads(text)
-        except Exception:
-            start, end = text.find('{'), text.rfind('}')
-            if start != -1 and end != -1:
-                return json.loads(text[start:end+1])
-            raise
+    def _without_test_cases(raw: Any) -> CodingQuestionSpec:
+        """Keep a question whose test cases are malformed; it is then evaluated by the model alone"""
+        return CodingQuestionSpec(**GeneratedCodingQuestion(**raw).model_dump())
 
     async def generate_coding_practice(self, input_data: GenerateCodingPracticeInput) -> GenerateCodingPracticeOutput:
-        prompt_text = f"""You are a computer science educator. Generate a JSON object with a 'questions' array containing exactly 5 coding practice questions for:
-Topic: {input_data.topic}
-Difficulty: {input_data.level}
+        student = input_data.student_register_number
+        skip_seen = (lambda q: self.seen_questions.has_seen(student, question_hash(q.get("question", "")))) if student else None
+
+        banked = self.question_bank.take(input_data.topic, input_data.level, self.QUESTIONS_PER_SET, skip=skip_seen)
+        if banked is not None:
+            print(f"📦 Served '{input_data.topic}' ({input_data.level}) from question bank")
+            specs = [CodingQuestionSpec(**q) for q in banked]
+        else:
+            specs = await self._generate_questions(input_data.topic, input_data.level)
+            self.question_bank.add(input_data.topic, input_data.level, [q.model_dump() for q in specs], served=1)
+
+        self.seen_questions.mark_seen(student, [question_hash(q.question) for q in specs])
+        # Test cases stay on the server; clients only receive the question text
+        questions = [GeneratedCodingQuestion(type=q.type, question=q.question) for q in specs]
+        return GenerateCodingPracticeOutput(questions=questions)
+
+    async def _generate_for_bank(self, topic: str, level: str) -> List[dict]:
+        questions = await self._generate_questions(topic, level)
+        return [q.model_dump() for q in questions]
+
+    async def _generate_questions(self, topic: str, level: str) -> List[CodingQuestionSpec]:
+        prompt_text = f"""You are a computer science educator. Generate a JSON object with a 'questions' array containing exactly {self.QUESTIONS_PER_SET} coding practice questions for:
+Topic: {topic}
+Difficulty: {level}
 
 Each must have:
 - 'type': 'coding'
 - 'question': string
+
+If a question can be solved in Python by a single function, also include:
+- 'function_name': the name of the function the student must write (state it in the question)
+- 'test_cases': 3-5 objects with 'input' (the arguments, each JSON-encoded) and 'expected' (the JSON-encoded return value)
 """
 
-        for attempt in range(3):
-            try:
-                data = self._extract_json(await self._call_model(prompt_text))
-                questions_raw = data.get("questions", [])
-                questions = [GeneratedCodingQuestion(**q) for q in questions_raw]
-                if len(questions) == 5:
-                    return GenerateCodingPracticeOutput(questions=questions)
-            except Exception as e:
-                if attempt == 2:
-                    raise RuntimeError(f"AI failed to generate coding questions: {e}")
-                await asyncio.sleep(1)
+        # Paraphrased duplicates are dropped; distinct questions are kept across attempts
+        accepted: List[CodingQuestionSpec] = []
+        dedup = NearDuplicateIndex()
+        # Retries and backoff share the endpoint deadline rather than getting one each
+        with endpoint_deadline("coding_generate"):
+            for attempt in range(3):
+                try:
+                    for question in await self._call_model_items(prompt_text):
+                        if dedup.add_if_new(len(accepted), question_text(question.model_dump())):
+                            accepted.append(question)
+                    if len(accepted) >= self.QUESTIONS_PER_SET:
+                        accepted = accepted[:self.QUESTIONS_PER_SET]
+                        self.test_cases.store([q.model_dump() for q in accepted])
+                        return accepted
+                except AIUnavailableError:
+                    # Quota, deadline or open circuit: retrying would only add load
+                    raise
+                except Exception as e:
+                    if attempt == 2:
+                        raise RuntimeError(f"AI failed to generate coding questions: {e}")
+                    await asyncio.sleep(backoff_delay(attempt))
 
         raise RuntimeError("Failed to generate questions.")
 
     async def evaluate_coding_practice(self, input_data: EvaluateCodingPracticeInput) -> EvaluateCodingPracticeOutput:
+        # Resubmissions that only differ in formatting or comments reuse the earlier evaluation
+        cache_key = self.evaluation_cache.make_key(input_data.question, input_data.userCode)
+        cached = self.evaluation_cache.get(cache_key)
+        if cached is not None:
+            print("♻️ Returning cached coding evaluation")
+            return cached
+
+        result, cacheable = await self._evaluate(input_data)
+        if cacheable:
+            self.evaluation_cache.put(cache_key, result)
+        return result
+
+    async def _evaluate(self, input_data: EvaluateCodingPracticeInput) -> Tuple[EvaluateCodingPracticeOutput, bool]:
+        """Evaluation plus whether it may be cached: not when it rests on a timeout or a sandbox crash,
+        which a less loaded server might not repeat"""
+        # Questions generated with test cases are Python function exercises and can be graded locally
+        spec = self.test_cases.get(input_data.question)
+        test_report = None
+        # Without an isolation mechanism (see CodeSandbox) the code is never run; the model grades it
+        if spec and self.sandbox.mode is not None:
+            syntax_error = check_syntax(input_data.userCode)
+            if syntax_error:
+                return EvaluateCodingPracticeOutput(
+                    isCorrect=False,
+                    feedback=f"Your code could not be run because of a syntax error: {syntax_error}.",
+                    score=0,
+                    suggestions="Fix the syntax error and submit again. Check for missing colons, brackets and indentation.",
+                ), True
+
+            test_report = await self.sandbox.run_tests(input_data.userCode, spec["function_name"], spec["test_cases"])
+            if test_report["conclusive"]:
+                return self._local_evaluation(test_report, spec), True
+
+        result = await self._model_evaluation(input_data, test_report, spec)
+        return result, not (test_report and test_report.get("transient"))
+
+    @staticmethod
+    def _local_evaluation(report: dict, spec: dict) -> EvaluateCodingPracticeOutput:
+        """Grade from a conclusive test report: every case passed, or the code failed to load"""
+        passed, total = report["passed"], report["total"]
+        if report.get("error"):
+            feedback = f"{report['error']} 0 of {total} test cases passed."
+        else:
+            feedback = f"All {total} test cases passed. ✅"
+
+        return EvaluateCodingPracticeOutput(
+            isCorrect=passed == total,
+            feedback=feedback,
+            score=round(10 * passed / total) if total else 0,
+            suggestions="Great work! Try handling edge cases such as empty or very large inputs." if passed == total
+            else "Fix the error so your code runs, then submit again.",
+        )
+
+    async def _model_evaluation(self, input_data: EvaluateCodingPracticeInput, test_report: dict = None,
+                                spec: dict = None) -> EvaluateCodingPracticeOutput:
+        test_context = ""
+        if test_report:
+            failing = [
+                f"{spec['function_name']}({', '.join(repr(a) for a in case['input'])}) expected {case['expected']!r}"
+                + (f", raised {result['error']}" if result.get("error") else ", got a different value")
+                for case, result in zip(spec["test_cases"], test_report["results"]) if not result["passed"]
+            ] if spec else []
+            test_context = f"""
+Automated test run: {test_report["passed"]} of {test_report["total"]} generated test cases passed. {test_report.get("error", "")}
+{("Failing cases: " + "; ".join(failing[:3])) if failing else ""}
+The test cases were generated automatically and may themselves be wrong. Judge the code on its own merits and
+only count a failing case against it if the expected value is actually correct for the question.
+"""
         prompt_text = f"""You are a strict computer science professor. Evaluate this code in JSON with:
 - isCorrect: bool
 - feedback: str
@@ -74,9 +179,10 @@ Question:
 
 User's Code:
 {input_data.userCode}
-"""
+{test_context}"""
         try:
-            data = self._extract_json(await self._call_model(prompt_text))
-            return EvaluateCodingPracticeOutput(**data)
+            return await self._call_model(prompt_text, EvaluateCodingPracticeOutput, endpoint="coding_evaluate")
+        except AIUnavailableError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Coding evaluation failed: {e}")
@@ -0,0 +1,44 @@
+# Test cases generated alongside coding questions, keyed by question hash
+import json
+import os
+from typing import Any, Dict, List, Optional
+from services.seen_questions_service import question_hash
+
+class CodingTestCaseService:
+    def __init__(self):
+        self.test_cases_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/coding_test_cases.json")
+        self._ensure_data_directory()
+        self._specs = self._load_test_cases()
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.test_cases_file), exist_ok=True)
+
+    def _load_test_cases(self) -> Dict[str, Dict[str, Any]]:
+        """Load cached test cases from file"""
+        try:
+            with open(self.test_cases_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_test_cases(self):
+        """Save cached test cases to file"""
+        with open(self.test_cases_file, 'w') as f:
+            json.dump(self._specs, f, indent=2)
+
+    def store(self, questions: List[Dict[str, Any]]):
+        """Cache the function name and test cases of any question that has them"""
+        changed = False
+        for q in questions:
+            if q.get("function_name") and q.get("test_cases"):
+                self._specs[question_hash(q["question"])] = {
+                    "function_name": q["function_name"],
+                    "test_cases": q["test_cases"],
+                }
+                changed = True
+        if changed:
+            self._save_test_cases()
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        return self._specs.get(question_hash(question))
@@ -0,0 +1,93 @@
+# Cache of coding evaluations keyed on the question and the normalised code AST
+import ast
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from services.seen_questions_service import question_hash
+from models.coding_models import EvaluateCodingPracticeOutput
+
+def canonical_code(code: str) -> str:
+    """Formatting-independent form of a submission.
+
+    Python code is reduced to its AST dump, which drops comments, blank lines,
+    indentation style, quote style and docstrings. Code that does not parse
+    (or is not Python) falls back to its text with trailing whitespace removed.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return "\n".join(line.rstrip() for line in code.strip().splitlines())
+
+    for node in ast.walk(tree):
+        body = getattr(node, "body", None)
+        if (isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                and body and isinstance(body[0], ast.Expr)
+                and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str)):
+            node.body = body[1:] or [ast.Pass()]
+    return ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+class EvaluationCache:
+    """LRU of EvaluateCodingPracticeOutput, persisted to data/evaluation_cache.json.
+
+    The file is rewritten at most once every SAVE_INTERVAL seconds (and on
+    ``flush``), not on every put.
+    """
+
+    MAX_ENTRIES = 5000
+    SAVE_INTERVAL = float(os.getenv("EVALUATION_CACHE_SAVE_SECONDS", "30"))
+
+    def __init__(self):
+        self.cache_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/evaluation_cache.json")
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._ensure_data_directory()
+        self._load_cache()
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+
+    def _load_cache(self):
+        """Load cached evaluations from file"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                self._entries = OrderedDict(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = OrderedDict()
+
+    def _save_cache(self):
+        """Save cached evaluations to file"""
+        with open(self.cache_file, 'w') as f:
+            json.dump(self._entries, f)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def flush(self):
+        """Write pending entries now (called on shutdown)"""
+        if self._dirty:
+            self._save_cache()
+
+    @staticmethod
+    def make_key(question: str, user_code: str) -> str:
+        digest = hashlib.sha256(canonical_code(user_code).encode("utf-8")).hexdigest()[:32]
+        return f"{question_hash(question)}:{digest}"
+
+    def get(self, key: str) -> Optional[EvaluateCodingPracticeOutput]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return EvaluateCodingPracticeOutput(**entry)
+
+    def put(self, key: str, result: EvaluateCodingPracticeOutput):
+        self._entries[key] = result.model_dump()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+            self._save_cache()
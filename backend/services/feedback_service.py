@@ -1,6 +1,7 @@
 # Feedback service for managing teacher-student feedback
 import json
 import os
+import asyncio
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from models.feedback_models import (
@@ -20,6 +21,8 @@ class FeedbackService:
         self.quiz_history_file = "data/quiz_history.json"
         self.coding_history_file = "data/coding_history.json"
         self.communication_history_file = "data/communication_history.json"
+        # Serialises load-append-save of the history files within this process
+        self._history_lock = asyncio.Lock()
         self._ensure_data_directory()
     
     def _ensure_data_directory(self):
@@ -54,9 +57,15 @@ class FeedbackService:
             return []
     
     def _save_data(self, file_path: str, data: List[dict]):
-        """Generic method to save JSON data to a file"""
-        with open(file_path, 'w') as f:
+        """Generic method to save JSON data to a file.
+
+        Writes go to a temporary file that replaces the original, so readers
+        never see a half-written history and no read-back check is needed.
+        """
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, file_path)
     
     def _load_quiz_history(self) -> List[dict]:
         """Load quiz history from JSON file"""
@@ -221,71 +230,92 @@ class FeedbackService:
     async def save_quiz_result(self, student_register_number: str, quiz_data: dict) -> bool:
         """Save quiz result to history"""
         try:
-            quiz_history = self._load_quiz_history()
+            async with self._history_lock:
+                quiz_history = self._load_quiz_history()
             
-            # Ensure the student_register_number is properly formatted
-            if not student_register_number or not isinstance(student_register_number, str):
-                print(f"Invalid student_register_number: {student_register_number}")
-                return False
+                # Ensure the student_register_number is properly formatted
+                if not student_register_number or not isinstance(student_register_number, str):
+                    print(f"Invalid student_register_number: {student_register_number}")
+                    return False
                 
-            # Create quiz result with all required fields
-            quiz_result = {
-                "student_register_number": student_register_number.upper().strip(),
-                "score": quiz_data.get("score", 0),
-                "total_questions": quiz_data.get("total_questions", 0),
-                "time_taken": quiz_data.get("time_taken", "00:00"),
-                "subject": quiz_data.get("subject", "General"),
-                "date": datetime.now().isoformat(),
-                "quiz_id": f"quiz_{len(quiz_history) + 1}_{int(datetime.now().timestamp())}"
-            }
+                # Create quiz result with all required fields
+                quiz_result = {
+                    "student_register_number": student_register_number.upper().strip(),
+                    "score": quiz_data.get("score", 0),
+                    "total_questions": quiz_data.get("total_questions", 0),
+                    "time_taken": quiz_data.get("time_taken", "00:00"),
+                    "subject": quiz_data.get("subject", "General"),
+                    "date": datetime.now().isoformat(),
+                    "quiz_id": f"quiz_{len(quiz_history) + 1}_{int(datetime.now().timestamp())}"
+                }
             
-            print(f"Saving quiz result for student {student_register_number}: {quiz_result}")
+                print(f"Saving quiz result for student {student_register_number}: {quiz_result}")
             
-            # Add to history and save
-            quiz_history.append(quiz_result)
-            self._save_quiz_history(quiz_history)
-            
-            # Verify the save was successful
-            updated_history = self._load_quiz_history()
-            if not any(q.get('quiz_id') == quiz_result['quiz_id'] for q in updated_history):
-                print("Failed to verify quiz result was saved")
-                return False
-                
-            return True
+                # Add to history and save
+                quiz_history.append(quiz_result)
+                self._save_quiz_history(quiz_history)
+                return True
             
         except Exception as e:
             print(f"Error saving quiz result: {str(e)}")
             return False
 
+    async def save_quiz_results(self, results: List[Dict[str, Any]]) -> int:
+        """Append many quiz results with a single history load and write.
+
+        Each item needs a ``student_register_number`` and the same fields as
+        ``quiz_data`` in save_quiz_result. Returns how many were recorded.
+        """
+        async with self._history_lock:
+            quiz_history = self._load_quiz_history()
+            timestamp = int(datetime.now().timestamp())
+            date = datetime.now().isoformat()
+            added = 0
+            for item in results:
+                student_register_number = item.get("student_register_number")
+                if not student_register_number or not isinstance(student_register_number, str):
+                    print(f"Invalid student_register_number: {student_register_number}")
+                    continue
+                quiz_history.append({
+                    "student_register_number": student_register_number.upper().strip(),
+                    "score": item.get("score", 0),
+                    "total_questions": item.get("total_questions", 0),
+                    "time_taken": item.get("time_taken", "00:00"),
+                    "subject": item.get("subject", "General"),
+                    "date": date,
+                    "quiz_id": f"quiz_{len(quiz_history) + 1}_{timestamp}"
+                })
+                added += 1
+            if added:
+                self._save_quiz_history(quiz_history)
+            print(f"Saved {added} batch quiz results")
+            return added
+
     async def save_coding_result(self, student_register_number: str, coding_data: dict) -> bool:
         """Save coding result to history"""
         try:
-            coding_history = self._load_coding_history()
+            async with self._history_lock:
+                coding_history = self._load_coding_history()
             
-            if not student_register_number or not isinstance(student_register_number, str):
-                print(f"Invalid student_register_number: {student_register_number}")
-                return False
+                if not student_register_number or not isinstance(student_register_number, str):
+                    print(f"Invalid student_register_number: {student_register_number}")
+                    return False
             
-            coding_result = {
-                "student_register_number": student_register_number.upper().strip(),
-                "question": coding_data.get("question", ""),
-                "score": coding_data.get("score", 0),  # expected 0-100
-                "is_correct": coding_data.get("is_correct", False),
-                "time_taken": coding_data.get("time_taken", "N/A"),
-                "subject": coding_data.get("subject", "Coding"),
-                "date": datetime.now().isoformat(),
-                "coding_id": f"code_{len(coding_history) + 1}_{int(datetime.now().timestamp())}"
-            }
+                coding_result = {
+                    "student_register_number": student_register_number.upper().strip(),
+                    "question": coding_data.get("question", ""),
+                    "score": coding_data.get("score", 0),  # expected 0-100
+                    "is_correct": coding_data.get("is_correct", False),
+                    "time_taken": coding_data.get("time_taken", "N/A"),
+                    "subject": coding_data.get("subject", "Coding"),
+                    "date": datetime.now().isoformat(),
+                    "coding_id": f"code_{len(coding_history) + 1}_{int(datetime.now().timestamp())}"
+                }
             
-            print(f"Saving coding result for student {student_register_number}: {coding_result}")
-            coding_history.append(coding_result)
-            self._save_coding_history(coding_history)
-            
-            updated = self._load_coding_history()
-            if not any(c.get('coding_id') == coding_result['coding_id'] for c in updated):
-                print("Failed to verify coding result was saved")
-                return False
-            return True
+                print(f"Saving coding result for student {student_register_number}: {coding_result}")
+                coding_history.append(coding_result)
+                self._save_coding_history(coding_history)
+                return True
         except Exception as e:
             print(f"Error saving coding result: {str(e)}")
             return False
@@ -293,37 +323,33 @@ class FeedbackService:
     async def save_communication_result(self, student_register_number: str, communication_data: dict) -> bool:
         """Save communication result to history"""
         try:
-            communication_history = self._load_communication_history()
-            
-            if not student_register_number or not isinstance(student_register_number, str):
-                print(f"Invalid student_register_number: {student_register_number}")
-                return False
+            async with self._history_lock:
+                communication_history = self._load_communication_history()
             
-            communication_result = {
-                "student_register_number": student_register_number.upper().strip(),
-                "transcription": communication_data.get("transcription", ""),
-                "overall_score": communication_data.get("overall_score", 0),  # expected 0-100
-                "clarity": communication_data.get("clarity", 0),
-                "confidence": communication_data.get("confidence", 0),
-                "articulation": communication_data.get("articulation", 0),
-                "feedback": communication_data.get("feedback", ""),
-                "suggestions": communication_data.get("suggestions", ""),
-                "analysis": communication_data.get("analysis", {}),
-                "time_taken": communication_data.get("time_taken", "N/A"),
-                "subject": communication_data.get("subject", "Communication"),
-                "date": datetime.now().isoformat(),
-                "communication_id": f"comm_{len(communication_history) + 1}_{int(datetime.now().timestamp())}"
-            }
+                if not student_register_number or not isinstance(student_register_number, str):
+                    print(f"Invalid student_register_number: {student_register_number}")
+                    return False
             
-            print(f"Saving communication result for student {student_register_number}: {communication_result}")
-            communication_history.append(communication_result)
-            self._save_communication_history(communication_history)
+                communication_result = {
+                    "student_register_number": student_register_number.upper().strip(),
+                    "transcription": communication_data.get("transcription", ""),
+                    "overall_score": communication_data.get("overall_score", 0),  # expected 0-100
+                    "clarity": communication_data.get("clarity", 0),
+                    "confidence": communication_data.get("confidence", 0),
+                    "articulation": communication_data.get("articulation", 0),
+                    "feedback": communication_data.get("feedback", ""),
+                    "suggestions": communication_data.get("suggestions", ""),
+                    "analysis": communication_data.get("analysis", {}),
+                    "time_taken": communication_data.get("time_taken", "N/A"),
+                    "subject": communication_data.get("subject", "Communication"),
+                    "date": datetime.now().isoformat(),
+                    "communication_id": f"comm_{len(communication_history) + 1}_{int(datetime.now().timestamp())}"
+                }
             
-            updated = self._load_communication_history()
-            if not any(c.get('communication_id') == communication_result['communication_id'] for c in updated):
-                print("Failed to verify communication result was saved")
-                return False
-            return True
+                print(f"Saving communication result for student {student_register_number}: {communication_result}")
+                communication_history.append(communication_result)
+                self._save_communication_history(communication_history)
+                return True
         except Exception as e:
             print(f"Error saving communication result: {str(e)}")
             return False
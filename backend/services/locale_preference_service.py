@@ -0,0 +1,62 @@
+# Per-student record of which recognition locale understands them best
+import json
+import os
+from typing import Dict, List, Optional
+
+DEFAULT_LOCALES = [l.strip() for l in os.getenv("TRANSCRIPTION_LOCALES", "en-US,en-IN,en-GB,en-AU").split(",") if l.strip()]
+
+class LocalePreferenceService:
+    """Counts successful recognitions per locale, per student and overall.
+
+    ``rank`` orders DEFAULT_LOCALES by the student's own successes, then by
+    everyone's (so a campus of en-IN speakers shifts the default for new
+    students), then by the configured order.
+    """
+
+    def __init__(self):
+        self.history_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/locale_history.json")
+        self._ensure_data_directory()
+        self._history: Dict[str, Dict[str, int]] = self._load_history()
+        self._totals: Dict[str, int] = {}
+        for counts in self._history.values():
+            for locale, count in counts.items():
+                self._totals[locale] = self._totals.get(locale, 0) + count
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+
+    def _load_history(self) -> Dict[str, Dict[str, int]]:
+        """Load locale success counts from file"""
+        try:
+            with open(self.history_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_history(self):
+        """Save locale success counts to file"""
+        with open(self.history_file, 'w') as f:
+            json.dump(self._history, f, indent=2)
+
+    @staticmethod
+    def _student_key(student_register_number: Optional[str]) -> str:
+        return (student_register_number or "").upper().strip()
+
+    def rank(self, student_register_number: Optional[str] = None) -> List[str]:
+        """Locales to try for a student, most likely to succeed first"""
+        own = self._history.get(self._student_key(student_register_number), {})
+        return sorted(DEFAULT_LOCALES, key=lambda locale: (
+            -own.get(locale, 0), -self._totals.get(locale, 0), DEFAULT_LOCALES.index(locale)))
+
+    def record(self, student_register_number: Optional[str], locale: Optional[str]):
+        """Count a successful recognition; anonymous attempts only update the totals"""
+        if not locale:
+            return
+        self._totals[locale] = self._totals.get(locale, 0) + 1
+        key = self._student_key(student_register_number)
+        if not key:
+            return
+        counts = self._history.setdefault(key, {})
+        counts[locale] = counts.get(locale, 0) + 1
+        self._save_history()
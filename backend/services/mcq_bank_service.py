@@ -0,0 +1,100 @@
+# Bank of validated quiz MCQs, retrievable by relevance to a study log
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from models.quiz_models import MCQQuestion
+from services.bm25_index import BM25Index
+from services.near_duplicate_index import NearDuplicateIndex, question_text
+from services.seen_questions_service import question_hash
+
+SkipFn = Callable[[MCQQuestion], bool]
+
+class MCQBankService:
+    """Every accepted quiz MCQ, persisted and indexed for retrieval.
+
+    ``retrieve`` ranks stored questions against a study log with BM25 and
+    returns those whose coverage clears RELEVANCE_THRESHOLD, so quizzes on
+    common syllabus topics can be assembled without a model call. New
+    questions are added to the BM25 and near-duplicate indexes incrementally.
+    """
+
+    RELEVANCE_THRESHOLD = float(os.getenv("MCQ_RELEVANCE_THRESHOLD", "0.6"))
+    MIN_MATCHED_TERMS = 2   # ignore matches on a single shared word
+    MAX_QUESTIONS = 20000   # oldest questions are dropped beyond this
+
+    def __init__(self):
+        self.bank_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/mcq_bank.json")
+        self._ensure_data_directory()
+        self._questions: Dict[str, dict] = self._load_bank()
+        self._index = BM25Index()
+        self._dedup = NearDuplicateIndex()
+        for qhash, entry in self._questions.items():
+            self._index_question(qhash, entry["data"])
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.bank_file), exist_ok=True)
+
+    def _load_bank(self) -> Dict[str, dict]:
+        """Load stored questions from file"""
+        try:
+            with open(self.bank_file, 'r') as f:
+                return json.load(f).get("questions", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_bank(self):
+        """Save stored questions to file"""
+        with open(self.bank_file, 'w') as f:
+            json.dump({"questions": self._questions}, f, indent=2)
+
+    def _index_question(self, qhash: str, data: dict):
+        # Relevance is judged on the stem; options often name things the log never mentions
+        self._index.add(qhash, data["question"])
+        self._dedup.add(qhash, question_text(data))
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def retrieve(self, study_log: str, count: int, skip: Optional[SkipFn] = None) -> List[MCQQuestion]:
+        """Up to ``count`` stored questions relevant to ``study_log``, most relevant first"""
+        selected: List[MCQQuestion] = []
+        batch = NearDuplicateIndex()
+        for qhash, _, coverage, matched in self._index.search(study_log, limit=count * 5):
+            if coverage < self.RELEVANCE_THRESHOLD or matched < self.MIN_MATCHED_TERMS:
+                continue
+            question = MCQQuestion(**self._questions[qhash]["data"])
+            if skip and skip(question):
+                continue
+            text = question_text(question.model_dump())
+            # Paraphrases stored under different hashes should not share a quiz
+            if not batch.add_if_new(qhash, text):
+                continue
+            selected.append(question)
+            if len(selected) == count:
+                break
+        return selected
+
+    def add(self, questions: List[MCQQuestion]) -> int:
+        """Store new questions, skipping near-duplicates of banked ones. Returns how many were added."""
+        added = 0
+        for question in questions:
+            data = question.model_dump()
+            qhash = question_hash(question.question)
+            if qhash in self._questions or self._dedup.find_duplicate(question_text(data)) is not None:
+                continue
+            self._questions[qhash] = {"data": data, "created_at": datetime.now().isoformat()}
+            self._index_question(qhash, data)
+            added += 1
+
+        while len(self._questions) > self.MAX_QUESTIONS:
+            oldest = next(iter(self._questions))
+            del self._questions[oldest]
+            self._index.remove(oldest)
+            self._dedup.remove(oldest)
+
+        if added:
+            self._save_bank()
+        return added
@@ -0,0 +1,125 @@
+# MinHash/LSH index for spotting paraphrased duplicate questions
+import os
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(4294967295)
+
+# Estimated Jaccard similarity above which two questions count as duplicates
+DEFAULT_THRESHOLD = float(os.getenv("QUESTION_SIMILARITY_THRESHOLD", "0.7"))
+
+# Words, numbers and code operators; numbers and operators are kept so "2**3" and "3**2" differ
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]\w*|\*\*|//|==|!=|<=|>=|[-+*/%<>=^&|~()\[\]{}]")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from given how in into is it its of on or that the this
+to what when which while who why will with write you your following
+""".split())
+
+def question_text(question: dict) -> str:
+    """Text used for similarity: the stem plus any answer options"""
+    parts = [question.get("question", "")]
+    parts.extend(str(option) for option in question.get("options", []) or [])
+    return " ".join(parts)
+
+class NearDuplicateIndex:
+    """Locality-sensitive index over MinHash signatures of token bigrams.
+
+    ``threshold`` is the estimated Jaccard similarity at or above which two
+    texts count as duplicates. Signatures are split into ``bands`` buckets of
+    ``num_perm // bands`` rows, so a lookup only compares against items that
+    share at least one bucket instead of scanning the whole index. The
+    default 16x4 banding has its S-curve midpoint near 0.5, which keeps
+    recall high for the 0.6-0.8 thresholds that are useful for questions.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        for suffix in ("ing", "es", "ed", "ly", "s", "e"):
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                return word[:-len(suffix)]
+        return word
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Set of adjacent token pairs (stemmed content words, numbers, operators).
+        Filler words are ignored, but word order and repeated tokens still count."""
+        tokens = [self._stem(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+        terms = {" ".join(tokens[i:i + 2]) for i in range(max(1, len(tokens) - 1))} if tokens else set()
+        return np.fromiter((zlib.crc32(t.encode("utf-8")) for t in terms), dtype=np.uint64, count=len(terms))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: min over shingles of (a*x + b) mod p for each permutation"""
+        shingles = self._shingles(text)
+        if shingles.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashed = (np.outer(shingles, self._a) + self._b) % _MERSENNE_PRIME
+        return hashed.min(axis=0)
+
+    def _band_keys(self, sig: np.ndarray) -> Iterable[bytes]:
+        for band in range(self.bands):
+            yield sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    @staticmethod
+    def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+    def find_duplicate(self, text: str, sig: Optional[np.ndarray] = None) -> Optional[Hashable]:
+        """Key of an indexed item at least ``threshold`` similar to ``text``, if any"""
+        if sig is None:
+            sig = self.signature(text)
+        checked = set()
+        for band, band_key in enumerate(self._band_keys(sig)):
+            for key in self._buckets[band].get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                if self.similarity(sig, self._signatures[key]) >= self.threshold:
+                    return key
+        return None
+
+    def add(self, key: Hashable, text: str, sig: Optional[np.ndarray] = None):
+        if sig is None:
+            sig = self.signature(text)
+        self._signatures[key] = sig
+        for band, band_key in enumerate(self._band_keys(sig)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def add_if_new(self, key: Hashable, text: str) -> bool:
+        """Index ``text`` unless it near-duplicates something already indexed. Returns True if added."""
+        sig = self.signature(text)
+        if self.find_duplicate(text, sig) is not None:
+            return False
+        self.add(key, text, sig)
+        return True
+
+    def remove(self, key: Hashable):
+        sig = self._signatures.pop(key, None)
+        if sig is None:
+            return
+        for band, band_key in enumerate(self._band_keys(sig)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
@@ -0,0 +1,190 @@
+# Question bank service for pre-generated coding practice questions
+import asyncio
+import json
+import os
+import random
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from services.near_duplicate_index import NearDuplicateIndex, question_text
+from services.seen_questions_service import question_hash
+
+RefillFn = Callable[[str, str], Awaitable[List[Dict[str, Any]]]]
+SkipFn = Callable[[Dict[str, Any]], bool]
+
+class QuestionBankService:
+    """Persistent stock of coding questions keyed by (normalised topic, level).
+
+    Requests are served from stock when enough questions are available. Every
+    lookup tracks topic popularity, and whenever a key's stock drops under the
+    low watermark a background task tops it up through ``refill_fn``.
+    """
+
+    LOW_WATERMARK = 15      # refill a key when fewer live questions remain
+    POOL_CAPACITY = 50      # never keep more than this many questions per key
+    MAX_SERVES = 25         # retire a question after it was served this often
+    MAX_REFILL_ROUNDS = 5   # model calls per refill task before giving up
+    MIN_POPULARITY = 2      # only stock keys that were requested more than once
+
+    def __init__(self, refill_fn: Optional[RefillFn] = None):
+        self.bank_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/coding_question_bank.json")
+        self.refill_fn = refill_fn
+        self._refill_tasks: Dict[str, asyncio.Task] = {}
+        self._dedup_indexes: Dict[str, NearDuplicateIndex] = {}
+        self._ensure_data_directory()
+        self._bank = self._load_bank()
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.bank_file), exist_ok=True)
+
+    def _load_bank(self) -> Dict[str, Any]:
+        """Load the question bank from file"""
+        try:
+            with open(self.bank_file, 'r') as f:
+                bank = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            bank = {}
+        bank.setdefault("pools", {})
+        bank.setdefault("popularity", {})
+        return bank
+
+    def _save_bank(self):
+        """Save the question bank to file"""
+        with open(self.bank_file, 'w') as f:
+            json.dump(self._bank, f, indent=2)
+
+    @staticmethod
+    def normalise_topic(topic: str) -> str:
+        """Lowercase, strip punctuation and collapse whitespace so 'Python  Lists!' == 'python lists'"""
+        topic = re.sub(r"[^\w\s+#]", " ", (topic or "").lower())
+        return re.sub(r"\s+", " ", topic).strip()
+
+    def make_key(self, topic: str, level: str) -> str:
+        return f"{self.normalise_topic(topic)}|{level}"
+
+    def _pool(self, key: str, topic: str = "", level: str = "") -> Dict[str, Any]:
+        pool = self._bank["pools"].get(key)
+        if pool is None:
+            pool = {"topic": topic, "level": level, "questions": []}
+            self._bank["pools"][key] = pool
+        return pool
+
+    def _dedup_index(self, key: str) -> NearDuplicateIndex:
+        """Near-duplicate index over a key's live questions, built on first use"""
+        index = self._dedup_indexes.get(key)
+        if index is None:
+            index = NearDuplicateIndex()
+            for q in self._bank["pools"].get(key, {}).get("questions", []):
+                index.add(question_hash(q["data"].get("question", "")), question_text(q["data"]))
+            self._dedup_indexes[key] = index
+        return index
+
+    def stock(self, topic: str, level: str) -> int:
+        """Number of live questions currently stocked for a key"""
+        pool = self._bank["pools"].get(self.make_key(topic, level))
+        return len(pool["questions"]) if pool else 0
+
+    def take(self, topic: str, level: str, count: int, skip: Optional[SkipFn] = None) -> Optional[List[Dict[str, Any]]]:
+        """Serve ``count`` questions from stock, or None when the key cannot cover the request.
+
+        Least-served questions are preferred so stock is spread evenly; questions
+        that reach MAX_SERVES are retired. ``skip`` filters out candidates the
+        caller must not receive (e.g. questions the student has already seen).
+        A refill is scheduled either way.
+        """
+        key = self.make_key(topic, level)
+        self._bank["popularity"][key] = self._bank["popularity"].get(key, 0) + 1
+        pool = self._pool(key, topic, level)
+
+        served = None
+        questions = pool["questions"]
+        candidates = [q for q in questions if skip is None or not skip(q["data"])]
+        if len(candidates) >= count:
+            ranked = sorted(candidates, key=lambda q: (q.get("served", 0), random.random()))
+            served = ranked[:count]
+            for q in served:
+                q["served"] = q.get("served", 0) + 1
+                if q["served"] >= self.MAX_SERVES:
+                    self._dedup_index(key).remove(question_hash(q["data"].get("question", "")))
+            pool["questions"] = [q for q in questions if q.get("served", 0) < self.MAX_SERVES]
+
+        self._save_bank()
+        self.schedule_refill(topic, level)
+
+        if served is None:
+            return None
+        return [q["data"] for q in served]
+
+    def add(self, topic: str, level: str, questions: List[Dict[str, Any]], served: int = 0) -> int:
+        """Add generated questions to a key's stock, skipping near-duplicates of stocked ones. Returns how many were stored."""
+        key = self.make_key(topic, level)
+        pool = self._pool(key, topic, level)
+        index = self._dedup_index(key)
+
+        added = 0
+        for data in questions:
+            if not data.get("question", "").strip() or len(pool["questions"]) >= self.POOL_CAPACITY:
+                continue
+            if not index.add_if_new(question_hash(data["question"]), question_text(data)):
+                continue
+            pool["questions"].append({
+                "data": data,
+                "served": served,
+                "created_at": datetime.now().isoformat(),
+            })
+            added += 1
+
+        if added:
+            self._save_bank()
+        return added
+
+    def schedule_refill(self, topic: str, level: str):
+        """Start a background refill for a key if it is under the watermark and not already refilling"""
+        key = self.make_key(topic, level)
+        if self.refill_fn is None or self._bank["popularity"].get(key, 0) < self.MIN_POPULARITY:
+            return
+        if self.stock(topic, level) >= self.LOW_WATERMARK:
+            return
+        task = self._refill_tasks.get(key)
+        if task is not None and not task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refill_tasks[key] = loop.create_task(self._refill(key, topic, level))
+
+    async def _refill(self, key: str, topic: str, level: str):
+        """Top a key up to the watermark using the configured generator"""
+        try:
+            for _ in range(self.MAX_REFILL_ROUNDS):
+                if self.stock(topic, level) >= self.LOW_WATERMARK:
+                    break
+                generated = await self.refill_fn(topic, level)
+                added = self.add(topic, level, generated)
+                print(f"📦 Refilled question bank '{key}' with {added} questions (stock: {self.stock(topic, level)})")
+                if not added:
+                    break
+        except Exception as e:
+            print(f"⚠️ Question bank refill failed for '{key}': {e}")
+        finally:
+            self._refill_tasks.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool sizes, popularity and in-flight refills for monitoring"""
+        pools = {
+            key: {
+                "topic": pool.get("topic", ""),
+                "level": pool.get("level", ""),
+                "stock": len(pool["questions"]),
+            }
+            for key, pool in self._bank["pools"].items()
+        }
+        popularity = sorted(self._bank["popularity"].items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "pools": pools,
+            "popularity": dict(popularity),
+            "refilling": sorted(key for key, task in self._refill_tasks.items() if not task.done()),
+            "low_watermark": self.LOW_WATERMARK,
+        }
@@ -0,0 +1,93 @@
+# Speculative quiz generation for freshly saved study logs
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+GenerateFn = Callable[[str, Optional[str]], Awaitable[Any]]
+
+def content_hash(study_log: str, student: Optional[str] = None) -> str:
+    # The quiz skips questions the student has already seen, so it is only valid for that student
+    return hashlib.sha256(f"{student or ''}\0{study_log.strip()}".encode("utf-8")).hexdigest()
+
+class QuizPrefetchService:
+    """Generates a quiz in the background as soon as a study log is saved.
+
+    Results are kept under the student and the log's content hash for
+    RESULT_TTL seconds and handed out once, to that student only. Speculative jobs are capped at MAX_CONCURRENT running at
+    a time and HOURLY_BUDGET started per hour; beyond either cap a log is
+    simply not prefetched and the quiz is generated on request as before.
+    """
+
+    MAX_CONCURRENT = int(os.getenv("QUIZ_PREFETCH_CONCURRENCY", "2"))
+    HOURLY_BUDGET = int(os.getenv("QUIZ_PREFETCH_HOURLY_BUDGET", "60"))
+    RESULT_TTL = 3600
+    MAX_RESULTS = 200
+
+    def __init__(self, generate_fn: GenerateFn):
+        self.generate_fn = generate_fn
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._started = deque()
+        self._stats = {"scheduled": 0, "skipped_busy": 0, "skipped_budget": 0, "hits": 0, "joined": 0, "misses": 0, "failed": 0}
+
+    def _within_budget(self) -> bool:
+        cutoff = time.monotonic() - 3600
+        while self._started and self._started[0] < cutoff:
+            self._started.popleft()
+        return len(self._started) < self.HOURLY_BUDGET
+
+    def schedule(self, study_log: str, student: Optional[str] = None) -> bool:
+        """Start generating a quiz for ``study_log`` unless one exists or a cap is hit"""
+        key = content_hash(study_log, student)
+        if key in self._tasks or key in self._results:
+            return False
+        if len(self._tasks) >= self.MAX_CONCURRENT:
+            self._stats["skipped_busy"] += 1
+            return False
+        if not self._within_budget():
+            self._stats["skipped_budget"] += 1
+            return False
+
+        self._started.append(time.monotonic())
+        self._stats["scheduled"] += 1
+        task = asyncio.create_task(self.generate_fn(study_log, student))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._store(key, t))
+        print(f"🔮 Prefetching quiz for study log {key[:12]}")
+        return True
+
+    def _store(self, key: str, task: asyncio.Task):
+        self._tasks.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._stats["failed"] += 1
+            print(f"⚠️ Quiz prefetch failed: {task.exception()}")
+            return
+        self._results[key] = (time.monotonic(), task.result())
+        while len(self._results) > self.MAX_RESULTS:
+            self._results.popitem(last=False)
+
+    async def take(self, study_log: str, student: Optional[str] = None) -> Optional[Any]:
+        """The prefetched quiz for ``student`` and ``study_log``, waiting for it if it is still being generated"""
+        key = content_hash(study_log, student)
+        task = self._tasks.get(key)
+        if task is not None:
+            self._stats["joined"] += 1
+            try:
+                await asyncio.shield(task)
+            except Exception:
+                return None
+
+        entry = self._results.pop(key, None)
+        if entry is None or time.monotonic() - entry[0] > self.RESULT_TTL:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return entry[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "running": len(self._tasks), "ready": len(self._results)}
@@ -1,51 +1,78 @@
 # Quiz service functions
-import json
+import time
 import random
 import asyncio
-import anyio
+import numpy as np
 from typing import List, Any, Optional
-from services.ai_service import get_ai_model
+from services.ai_service import endpoint_deadline, generate_json, generate_json_items
+from services.study_log_condenser import StudyLogCondenser, estimate_tokens
+from services.mcq_bank_service import MCQBankService
+from services.quiz_prefetch_service import QuizPrefetchService
+from services.quiz_session_store import QuizSessionStore
+from services.ai_resilience import AIUnavailableError, backoff_delay
+from services.seen_questions_service import get_seen_questions_service, question_hash
+from services.near_duplicate_index import NearDuplicateIndex, question_text
 from models.quiz_models import (
     GeneratePersonalizedQuizInput,
     GeneratePersonalizedQuizOutput,
     MCQQuestion,
+    MCQQuestionView,
     EvaluateQuizInput,
     EvaluateQuizOutput,
     Evaluation,
+    BatchEvaluateQuizInput,
+    BatchEvaluateQuizOutput,
+    BatchStudentScore,
 )
 
 class QuizService:
     def __init__(self):
-        self.ai_model = get_ai_model()
-
-    async def _call_model(self, prompt_text: str) -> str:
-        def _task():
-            resp = self.ai_model.generate_content(prompt_text)
-            return (getattr(resp, "text", "") or "").strip()
-        return await anyio.to_thread.run_sync(_task)
-
-    @staticmethod
-    def _extract_json(response_text: str) -> dict:
-        text = response_text.strip()
-        if text.startswith("```json"):
-            text = text[7:].strip()
-        elif text.startswith("```"):
-            text = text[3:].strip()
-        if text.endswith("```"):
-            text = text[:-3].strip()
-        try:
-            return json.loads(text)
-        except Exception:
-            start, end = text.find('{'), text.rfind('}')
-            if start != -1 and end != -1:
-                return json.loads(text[start:end+1])
-            raise
+        self.seen_questions = get_seen_questions_service()
+        self.condenser = StudyLogCondenser()
+        self.mcq_bank = MCQBankService()
+        self.prefetch = QuizPrefetchService(self._build_quiz)
+        self.sessions = QuizSessionStore()
+
+    async def _call_model(self, prompt_text: str, response_model: Any, endpoint: str = "quiz_generate") -> Any:
+        return await generate_json(prompt_text, response_model, endpoint=endpoint)
+
+    async def _call_model_items(self, prompt_text: str, item_cls: Any, endpoint: str = "quiz_generate") -> List[Any]:
+        return await generate_json_items(prompt_text, item_cls, endpoint=endpoint)
 
     async def generate_personalized_quiz(self, input_data: GeneratePersonalizedQuizInput) -> GeneratePersonalizedQuizOutput:
-        study_log = input_data.studyLog
+        student = input_data.student_register_number
+        mcqs = await self.prefetch.take(input_data.studyLog, student)
+        if mcqs is not None:
+            print("⚡ Serving prefetched quiz")
+        else:
+            mcqs = await self._build_quiz(input_data.studyLog, student)
+        self.seen_questions.mark_seen(student, [question_hash(q.question) for q in mcqs])
+        # Answer keys stay on the server; /quiz/evaluate only needs the quiz_id and answers
+        return GeneratePersonalizedQuizOutput(
+            questions=[MCQQuestionView(question=q.question, options=q.options) for q in mcqs],
+            quiz_id=self.sessions.create(mcqs),
+        )
+
+    def prefetch_quiz(self, study_log: str, student: Optional[str] = None) -> bool:
+        """Speculatively generate the quiz for a study log that was just saved"""
+        return self.prefetch.schedule(study_log, student)
+
+    async def _build_quiz(self, raw_study_log: str, student: Optional[str]) -> List[MCQQuestion]:
+        # Long logs are reduced to their key concepts so the prompt size stays bounded
+        study_log = await self.condenser.condense(raw_study_log)
         num_questions = 20  # Align with frontend request
 
-        mcq_prompt = f"""You are an expert educator. Based on the study log below, generate a JSON object with a 'questions' array containing exactly {num_questions} multiple-choice questions. Each question must have:
+        # Stored questions that match the log are reused; the model only writes the remainder
+        started = time.perf_counter()
+        skip_seen = (lambda q: self.seen_questions.has_seen(student, question_hash(q.question))) if student else None
+        retrieved = self.mcq_bank.retrieve(study_log, num_questions, skip=skip_seen)
+        print(f"📚 Retrieved {len(retrieved)}/{num_questions} questions from the MCQ bank "
+              f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+        remaining = num_questions - len(retrieved)
+        if remaining == 0:
+            return retrieved
+
+        mcq_prompt = f"""You are an expert educator. Based on the study log below, generate a JSON object with a 'questions' array containing exactly {remaining} multiple-choice questions. Each question must have:
 - 'type': 'mcq'
 - 'question': string
 - 'options': array of exactly 4 strings
@@ -54,41 +81,61 @@ class QuizService:
 Study Log:
 {study_log}
 """
-        
-        mcqs = await self._generate_questions(mcq_prompt, num_questions, MCQQuestion)
-        return GeneratePersonalizedQuizOutput(questions=mcqs)
-
-    async def _generate_questions(self, prompt_text: str, expected_count: int, model_cls: Any) -> List[Any]:
-        for attempt in range(3):
-            try:
-                data = self._extract_json(await self._call_model(prompt_text))
-                questions_raw = data.get("questions", [])
-                
-                if len(questions_raw) >= expected_count:
-                    # Validate and return the exact number of questions
-                    questions = [model_cls(**q) for q in questions_raw[:expected_count]]
-                    return questions
-            except Exception as e:
-                if attempt == 2:
-                    raise RuntimeError(f"AI failed to generate {expected_count} questions: {e}")
-                await asyncio.sleep(1)
+        print(f"🧮 Quiz prompt ~{estimate_tokens(mcq_prompt)} tokens (study log ~{estimate_tokens(raw_study_log)} tokens)")
+
+        generated = await self._generate_questions(mcq_prompt, remaining, MCQQuestion, existing=retrieved)
+        self.mcq_bank.add(generated)
+        return retrieved + generated
+
+    async def _generate_questions(self, prompt_text: str, expected_count: int, model_cls: Any,
+                                  existing: Optional[List[Any]] = None) -> List[Any]:
+        # Paraphrased duplicates (of each other or of ``existing``) are dropped;
+        # distinct questions are kept across attempts
+        accepted: List[Any] = []
+        dedup = NearDuplicateIndex()
+        for i, question in enumerate(existing or []):
+            dedup.add(("existing", i), question_text(question.model_dump()))
+        # Retries and backoff share the endpoint deadline rather than getting one each
+        with endpoint_deadline("quiz_generate"):
+            for attempt in range(3):
+                try:
+                    for question in await self._call_model_items(prompt_text, model_cls):
+                        if dedup.add_if_new(len(accepted), question_text(question.model_dump())):
+                            accepted.append(question)
+
+                    if len(accepted) >= expected_count:
+                        return accepted[:expected_count]
+                    print(f"⚠️ Only {len(accepted)}/{expected_count} distinct questions after attempt {attempt + 1}")
+                except AIUnavailableError:
+                    # Quota, deadline or open circuit: retrying would only add load
+                    raise
+                except Exception as e:
+                    if attempt == 2:
+                        raise RuntimeError(f"AI failed to generate {expected_count} questions: {e}")
+                    await asyncio.sleep(backoff_delay(attempt))
         raise RuntimeError(f"Generation failed after multiple attempts for {expected_count} questions.")
 
     async def evaluate_quiz(self, input_data: EvaluateQuizInput) -> EvaluateQuizOutput:
-        questions = input_data.questions
+        # Only the server's copy of the questions is trusted; clients never see or send the answer key.
+        # Grading closes the quiz, since the feedback reveals the correct answers
+        questions = self.sessions.pop(input_data.quiz_id)
+        if questions is None:
+            if self.sessions.was_graded(input_data.quiz_id):
+                raise ValueError("This quiz has already been graded. Please generate a new quiz.")
+            raise ValueError("Quiz session expired or not found. Please generate a new quiz.")
+
         answers = input_data.answers
         feedback: List[Optional[Evaluation]] = [None] * len(questions)
         
-        for i, qd in enumerate(questions):
-            qtype = qd.get("type")
+        for i, mcq in enumerate(questions):
             ans = answers[i] if i < len(answers) else None
-            if qtype == "mcq":
-                mcq = MCQQuestion(**qd)
+            if mcq is not None:
                 correct = mcq.answer == ans
                 feedback[i] = Evaluation(
                     isCorrect=correct,
                     feedback="Correct! ✅" if correct else f"Incorrect ❌. Correct answer: {mcq.options[mcq.answer]}",
                     score=10 if correct else 0,
+                    correctAnswer=mcq.answer,
                 )
         
         final_feedback = [fb if fb else Evaluation(isCorrect=False, feedback="Evaluation missing.", score=0) for fb in feedback]
@@ -99,4 +146,36 @@ Study Log:
             individualFeedback=final_feedback, 
             overallScore=overall_percentage, 
             suggestions="Great job! Keep practicing to reinforce your knowledge."
-        )
\ No newline at end of file
+        )
+
+    def evaluate_quiz_batch(self, input_data: BatchEvaluateQuizInput) -> BatchEvaluateQuizOutput:
+        """Score N answer vectors against one answer key with a single (N x questions) comparison"""
+        if input_data.quiz_id:
+            questions = self.sessions.get(input_data.quiz_id)
+            if questions is None:
+                raise ValueError("Quiz session expired or not found. Please generate a new quiz.")
+            answer_key = [q.answer for q in questions]
+        elif input_data.answer_key:
+            answer_key = input_data.answer_key
+        else:
+            raise ValueError("Either quiz_id or answer_key is required.")
+
+        num_questions = len(answer_key)
+        # Unanswered, out-of-range, missing and extra answers never match; -1 is not an option index
+        matrix = np.full((len(input_data.submissions), num_questions), -1, dtype=np.int8)
+        for row, submission in enumerate(input_data.submissions):
+            answers = [a if a is not None and 0 <= a <= 3 else -1 for a in submission.answers[:num_questions]]
+            matrix[row, :len(answers)] = answers
+
+        correct = matrix == np.asarray([a if 0 <= a <= 3 else -2 for a in answer_key], dtype=np.int8)
+        correct_counts = correct.sum(axis=1)
+        scores = np.rint(correct_counts * 100 / num_questions).astype(int) if num_questions else np.zeros(len(matrix), dtype=int)
+
+        return BatchEvaluateQuizOutput(
+            scores=[
+                BatchStudentScore(student_register_number=sub.student_register_number, correct=int(c), score=int(sc))
+                for sub, c, sc in zip(input_data.submissions, correct_counts, scores)
+            ],
+            question_correct_rates=[round(float(rate), 4) for rate in correct.mean(axis=0)] if num_questions else [],
+            average_score=round(float(scores.mean()), 2),
+        )
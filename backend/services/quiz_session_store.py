@@ -0,0 +1,66 @@
+# Server-side store of generated quizzes, so evaluation only needs the answers
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from models.quiz_models import MCQQuestion
+
+class QuizSessionStore:
+    """In-memory quizzes keyed by ``quiz_id``, expiring after SESSION_TTL seconds.
+
+    The stored questions (with their answer keys) never have to round-trip
+    through the client, and they are kept as validated MCQQuestion objects.
+    A quiz is graded once: ``pop`` removes it, so the answer key that grading
+    reveals cannot be replayed against the same quiz_id. At most MAX_SESSIONS
+    quizzes are held; the oldest are dropped first.
+    """
+
+    SESSION_TTL = int(os.getenv("QUIZ_SESSION_TTL", str(2 * 3600)))
+    MAX_SESSIONS = 10000
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        # quiz_id -> time it was graded, kept as long as the quiz could have lived
+        self._graded: "OrderedDict[str, float]" = OrderedDict()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.SESSION_TTL
+        while self._sessions:
+            quiz_id, (created, _) = next(iter(self._sessions.items()))
+            if created >= cutoff and len(self._sessions) <= self.MAX_SESSIONS:
+                break
+            del self._sessions[quiz_id]
+        while self._graded:
+            quiz_id, graded = next(iter(self._graded.items()))
+            if graded >= cutoff and len(self._graded) <= self.MAX_SESSIONS:
+                break
+            del self._graded[quiz_id]
+
+    def create(self, questions: List[MCQQuestion]) -> str:
+        quiz_id = uuid.uuid4().hex
+        self._sessions[quiz_id] = (time.monotonic(), list(questions))
+        self._expire()
+        return quiz_id
+
+    def get(self, quiz_id: str) -> Optional[List[MCQQuestion]]:
+        """Questions of a live quiz, or None if it is unknown or expired"""
+        self._expire()
+        session = self._sessions.get(quiz_id)
+        return session[1] if session else None
+
+    def pop(self, quiz_id: str) -> Optional[List[MCQQuestion]]:
+        """Questions of a live quiz, closing it so it cannot be graded again; None if unknown or expired"""
+        self._expire()
+        session = self._sessions.pop(quiz_id, None)
+        if session is None:
+            return None
+        self._graded[quiz_id] = time.monotonic()
+        return session[1]
+
+    def was_graded(self, quiz_id: str) -> bool:
+        return quiz_id in self._graded
+
+    def __len__(self) -> int:
+        return len(self._sessions)
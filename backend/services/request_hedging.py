@@ -0,0 +1,124 @@
+# Hedged requests: race a duplicate call when the first one is slower than usual
+import asyncio
+import math
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies, in seconds"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+class RequestHedger:
+    """Issues a second identical call once the first has run past the
+    HEDGE_PERCENTILE of recent latency for its endpoint; the first successful
+    result wins.
+
+    The losing call is ignored, not cancelled: a blocking SDK call in a worker
+    thread runs to completion (bounded by its request timeout) and still uses
+    quota. Extra calls are therefore capped at HEDGE_BUDGET (a fraction of
+    primary calls) per endpoint and MAX_CONCURRENT_HEDGES in flight overall,
+    and nothing is hedged until MIN_SAMPLES latencies are known.
+    """
+
+    HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "95"))
+    HEDGE_BUDGET = float(os.getenv("AI_HEDGE_BUDGET", "0.1"))
+    MAX_CONCURRENT_HEDGES = int(os.getenv("AI_MAX_CONCURRENT_HEDGES", "2"))
+    MIN_SAMPLES = 20
+
+    def __init__(self, endpoints: Iterable[str]):
+        self.endpoints = set(endpoints)
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._hedges_in_flight = 0
+
+    def record_latency(self, endpoint: str, seconds: float):
+        self._latency.setdefault(endpoint, LatencyTracker()).record(seconds)
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this call should not be hedged"""
+        tracker = self._latency.get(endpoint)
+        if endpoint not in self.endpoints or tracker is None or len(tracker) < self.MIN_SAMPLES:
+            return None
+        return tracker.percentile(self.HEDGE_PERCENTILE)
+
+    def _within_budget(self, stats: Dict[str, int]) -> bool:
+        return stats["hedged"] < self.HEDGE_BUDGET * stats["requests"]
+
+    async def run(self, endpoint: str, call: Callable[[bool], Awaitable[Any]],
+                  can_hedge: Callable[[], bool] = lambda: True) -> Any:
+        """Run ``call(False)``, racing ``call(True)`` against it if it is slow"""
+        stats = self._stats.setdefault(endpoint, {"requests": 0, "hedged": 0, "hedge_wins": 0, "over_budget": 0,
+                                                  "at_capacity": 0})
+        stats["requests"] += 1
+
+        delay = self.hedge_delay(endpoint)
+        primary = asyncio.ensure_future(call(False))
+        if delay is None:
+            return await primary
+
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._within_budget(stats):
+                stats["over_budget"] += 1
+                return await primary
+            if self._hedges_in_flight >= self.MAX_CONCURRENT_HEDGES:
+                stats["at_capacity"] += 1
+                return await primary
+            if not can_hedge():
+                return await primary
+
+            stats["hedged"] += 1
+            self._hedges_in_flight += 1
+            hedge = asyncio.ensure_future(call(True))
+            hedge.add_done_callback(self._hedge_finished)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            stats["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: the primary's error is the one the caller would have seen without hedging
+            raise primary.exception()
+        finally:
+            # Stops waiting on the loser; its worker thread (if any) still runs to completion
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _hedge_finished(self, task: asyncio.Future):
+        self._hedges_in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            tracker = self._latency.get(endpoint, LatencyTracker())
+            endpoints[endpoint] = {
+                **stats,
+                "hedge_rate": round(stats["hedged"] / stats["requests"], 3) if stats["requests"] else 0.0,
+                "latency_p50": tracker.percentile(50),
+                "latency_p99": tracker.percentile(99),
+            }
+        return {"enabled_endpoints": sorted(self.endpoints), "hedges_in_flight": self._hedges_in_flight,
+                "endpoints": endpoints}
@@ -0,0 +1,113 @@
+# Per-student record of questions already delivered, backed by Bloom filters
+import base64
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional
+
+def question_hash(text: str) -> str:
+    """Stable hash of a question stem, insensitive to case and whitespace"""
+    normalised = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:16]
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a single blake2b digest.
+
+    With the defaults (16384 bits = 2 KB, 7 probes) roughly 1000 questions per
+    student stay under a 1% false-positive rate. A false positive only means a
+    stored question is skipped, never that a repeat is served.
+    """
+
+    NUM_BITS = 16384
+    NUM_HASHES = 7
+
+    def __init__(self, bits: Optional[bytes] = None):
+        self.bits = bytearray(bits) if bits else bytearray(self.NUM_BITS // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.NUM_HASHES):
+            yield (h1 + i * h2) % self.NUM_BITS
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_b64(self) -> str:
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    @classmethod
+    def from_b64(cls, data: str) -> "BloomFilter":
+        return cls(base64.b64decode(data))
+
+class SeenQuestionsService:
+    def __init__(self):
+        self.seen_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/seen_questions.json")
+        self._filters: Dict[str, BloomFilter] = {}
+        self._counts: Dict[str, int] = {}
+        self._ensure_data_directory()
+        self._load_filters()
+
+    def _ensure_data_directory(self):
+        """Ensure data directory exists"""
+        os.makedirs(os.path.dirname(self.seen_file), exist_ok=True)
+
+    def _load_filters(self):
+        """Load all student filters from file"""
+        try:
+            with open(self.seen_file, 'r') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        for student, entry in stored.items():
+            try:
+                self._filters[student] = BloomFilter.from_b64(entry["bits"])
+                self._counts[student] = entry.get("count", 0)
+            except Exception as e:
+                print(f"⚠️ Dropping corrupt seen-question filter for {student}: {e}")
+
+    def _save_filters(self):
+        """Save all student filters to file"""
+        stored = {
+            student: {"bits": bloom.to_b64(), "count": self._counts.get(student, 0)}
+            for student, bloom in self._filters.items()
+        }
+        with open(self.seen_file, 'w') as f:
+            json.dump(stored, f, indent=2)
+
+    @staticmethod
+    def _student_key(student_register_number: str) -> str:
+        return (student_register_number or "").upper().strip()
+
+    def has_seen(self, student_register_number: Optional[str], qhash: str) -> bool:
+        """O(1) membership check; anonymous students have seen nothing"""
+        key = self._student_key(student_register_number)
+        bloom = self._filters.get(key) if key else None
+        return bloom is not None and qhash in bloom
+
+    def mark_seen(self, student_register_number: Optional[str], qhashes: Iterable[str]):
+        """Record delivered question hashes for a student"""
+        key = self._student_key(student_register_number)
+        if not key:
+            return
+        bloom = self._filters.setdefault(key, BloomFilter())
+        for qhash in qhashes:
+            if qhash not in bloom:
+                bloom.add(qhash)
+                self._counts[key] = self._counts.get(key, 0) + 1
+        self._save_filters()
+
+# Shared instance so quiz and coding services write to the same filters
+_seen_questions_service: Optional[SeenQuestionsService] = None
+
+def get_seen_questions_service() -> SeenQuestionsService:
+    global _seen_questions_service
+    if _seen_questions_service is None:
+        _seen_questions_service = SeenQuestionsService()
+    return _seen_questions_service
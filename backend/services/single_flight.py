@@ -0,0 +1,44 @@
+# Coalesces identical in-flight async calls into one shared execution
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """Concurrent callers with the same key await one shared task.
+
+    The shared task is independent of any single caller, so a client that
+    disconnects does not cancel the call for everyone else waiting on it.
+    Once it finishes the key is released and the next call runs fresh.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], label: str = "default") -> Any:
+        stats = self._stats.setdefault(label, {"requests": 0, "executions": 0, "coalesced": 0})
+        stats["requests"] += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every waiter went away
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-label request counts and coalescing ratio (share of requests that reused a call)"""
+        endpoints = {
+            label: {**stats, "coalescing_ratio": round(stats["coalesced"] / stats["requests"], 3) if stats["requests"] else 0.0}
+            for label, stats in self._stats.items()
+        }
+        return {"endpoints": endpoints, "in_flight": len(self._inflight)}
@@ -0,0 +1,121 @@
+# Response schemas for constrained JSON output, derived from the Pydantic models
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+
+# Keys of the OpenAPI subset Gemini accepts in a response schema
+_PASSTHROUGH_KEYS = ("description", "enum", "nullable", "format")
+
+def _resolve(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        return _resolve(defs[node["$ref"].split("/")[-1]], defs)
+    return node
+
+def _is_any(node: Dict[str, Any]) -> bool:
+    """An unconstrained value (``Any`` in the model); Gemini schemas have no equivalent"""
+    return not any(k in node for k in ("type", "$ref", "anyOf", "const", "enum", "properties", "items"))
+
+def _convert(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    node = _resolve(node, defs)
+
+    if "anyOf" in node:
+        # Optional[X] is anyOf [X, null]; other unions are not representable
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        schema = _convert(options[0], defs) if len(options) == 1 else _convert({}, defs)
+        schema["nullable"] = True
+        if node.get("description"):
+            schema["description"] = node["description"]
+        return schema
+
+    if _is_any(node):
+        # Sent as a JSON-encoded string and decoded again by parse_response
+        return {"type": "string", "description": ((node.get("description") or "") + " (JSON-encoded value)").strip()}
+
+    if "const" in node:
+        return {"type": "string", "enum": [node["const"]]}
+
+    schema = {k: node[k] for k in _PASSTHROUGH_KEYS if k in node}
+    schema["type"] = node["type"]
+    if node["type"] == "object":
+        schema["properties"] = {name: _convert(prop, defs) for name, prop in node.get("properties", {}).items()}
+        if node.get("required"):
+            schema["required"] = list(node["required"])
+    elif node["type"] == "array":
+        schema["items"] = _convert(node.get("items", {}), defs)
+        if "minItems" in node:
+            schema["min_items"] = node["minItems"]
+        if "maxItems" in node:
+            schema["max_items"] = node["maxItems"]
+    return schema
+
+def response_schema(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """Gemini response schema for ``model_cls``.
+
+    Constraints the API cannot express (numeric bounds, non-optional unions)
+    are dropped here and still enforced when the response is validated.
+    """
+    json_schema = model_cls.model_json_schema()
+    return _convert(json_schema, json_schema.get("$defs", {}))
+
+@lru_cache(maxsize=None)
+def list_model(item_cls: Type[BaseModel], field: str = "questions") -> Type[BaseModel]:
+    """Wrapper model ``{field: [item_cls, ...]}`` for list-shaped responses"""
+    return create_model(f"{item_cls.__name__}List", **{field: (List[item_cls], ...)})
+
+def _decode_any(value: Any, node: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    node = _resolve(node, defs)
+    if "anyOf" in node:
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        return _decode_any(value, options[0] if len(options) == 1 else {}, defs) if value is not None else None
+    if _is_any(node):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                return value
+        return value
+    if node.get("type") == "object" and isinstance(value, dict):
+        props = node.get("properties", {})
+        return {k: _decode_any(v, props[k], defs) if k in props else v for k, v in value.items()}
+    if node.get("type") == "array" and isinstance(value, list):
+        return [_decode_any(v, node.get("items", {}), defs) for v in value]
+    return value
+
+def parse_response(text: str, model_cls: Type[BaseModel]) -> BaseModel:
+    """Validate a schema-constrained response, decoding JSON-encoded ``Any`` fields"""
+    json_schema = model_cls.model_json_schema()
+    data = _decode_any(json.loads(text), json_schema, json_schema.get("$defs", {}))
+    return model_cls.model_validate(data)
+
+def parse_items(text: str, item_cls: Type[BaseModel], field: str = "questions",
+                salvage: Optional[Callable[[Any], Optional[BaseModel]]] = None) -> Tuple[List[BaseModel], int]:
+    """Validate each item of a ``list_model`` response on its own.
+
+    A malformed item is passed to ``salvage`` (which may return a reduced
+    version of it) or dropped, rather than failing the whole batch. Returns
+    the valid items and the number dropped; raises ValueError only when the
+    response is not JSON or has no ``field`` list.
+    """
+    json_schema = list_model(item_cls, field).model_json_schema()
+    data = _decode_any(json.loads(text), json_schema, json_schema.get("$defs", {}))
+    items = data.get(field) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError(f"response has no '{field}' list")
+    valid, dropped = [], 0
+    for raw in items:
+        try:
+            valid.append(item_cls.model_validate(raw))
+            continue
+        except ValidationError:
+            pass
+        try:
+            item = salvage(raw) if salvage else None
+        except (ValidationError, TypeError):
+            item = None
+        if item is None:
+            dropped += 1
+        else:
+            valid.append(item)
+    return valid, dropped
@@ -0,0 +1,137 @@
+# Condenses long study logs into key concepts before quiz generation
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import anyio
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"[a-z][a-z0-9_+#]*")
+
+_STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being between both but by
+can could did do does doing done each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+out over own same she should so some such than that the their them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would
+you your today learned learnt studied went got also really
+""".split())
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English prose (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+def content_words(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 2]
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith("#") or (len(stripped.split()) <= 8 and stripped.endswith(":"))
+
+class StudyLogCondenser:
+    """Map-reduce condensing of long study logs.
+
+    Logs up to DIRECT_TOKENS are used verbatim. Longer logs are split into
+    chunks of about CHUNK_TOKENS on paragraph and sentence boundaries; each
+    chunk is mapped concurrently to its highest scoring sentences (TF-IDF
+    over content words, with IDF taken across chunks) and headings, then the
+    best candidates overall are kept in their original order. The condensed
+    text stays within CONDENSED_TOKENS however long the log is, so the quiz
+    prompt has a bounded size.
+    """
+
+    DIRECT_TOKENS = int(os.getenv("STUDY_LOG_DIRECT_TOKENS", "1500"))
+    CHUNK_TOKENS = 800
+    CONDENSED_TOKENS = 1200
+
+    def chunk(self, text: str) -> List[str]:
+        max_chars = self.CHUNK_TOKENS * 4
+        pieces: List[str] = []
+        for paragraph in _PARAGRAPH_RE.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) <= max_chars:
+                pieces.append(paragraph)
+                continue
+            for sentence in _SENTENCE_RE.split(paragraph):
+                # A single run-on "sentence" longer than a chunk is cut by length
+                pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars) if sentence.strip())
+
+        chunks: List[str] = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _key_sentences(chunk: str, idf: dict, budget_chars: int) -> List[Tuple[float, int, str]]:
+        """Map step: the chunk's best (score, position, sentence) candidates within its budget"""
+        sentences = [s.strip() for s in _SENTENCE_RE.split(chunk) if s.strip()]
+        scored = []
+        for position, sentence in enumerate(sentences):
+            words = content_words(sentence)
+            if _is_heading(sentence):
+                score = float("inf")
+            elif words:
+                tf = Counter(words)
+                score = sum(count * idf.get(word, 0.0) for word, count in tf.items()) / math.sqrt(len(words))
+            else:
+                continue
+            scored.append((score, position, sentence))
+
+        chosen, used = [], 0
+        for candidate in sorted(scored, key=lambda item: (-item[0], item[1])):
+            if used + len(candidate[2]) > budget_chars and chosen:
+                continue
+            chosen.append(candidate)
+            used += len(candidate[2])
+        return chosen
+
+    async def condense(self, text: str) -> str:
+        """Return ``text`` unchanged if short, otherwise its key concepts as a bullet list"""
+        if estimate_tokens(text) <= self.DIRECT_TOKENS:
+            return text
+
+        chunks = self.chunk(text)
+        chunk_words = [set(content_words(c)) for c in chunks]
+        df = Counter(word for words in chunk_words for word in words)
+        idf = {word: math.log(1 + len(chunks) / count) + 1.0 for word, count in df.items()}
+        total_chars = sum(len(c) for c in chunks)
+        budget = self.CONDENSED_TOKENS * 4
+
+        results: List[List[Tuple[float, int, str]]] = [[] for _ in chunks]
+
+        async def _map(i: int):
+            share = budget * len(chunks[i]) // total_chars
+            results[i] = await anyio.to_thread.run_sync(self._key_sentences, chunks[i], idf, share)
+
+        async with anyio.create_task_group() as tg:
+            for i in range(len(chunks)):
+                tg.start_soon(_map, i)
+
+        # Reduce: keep the best candidates overall within the budget, in document order
+        candidates = sorted(
+            ((score, i, position, sentence) for i, chunk_results in enumerate(results)
+             for score, position, sentence in chunk_results),
+            key=lambda item: (-item[0], item[1], item[2]),
+        )
+        kept, used = [], 0
+        for score, i, position, sentence in candidates:
+            if used + len(sentence) > budget:
+                continue
+            kept.append((i, position, sentence))
+            used += len(sentence)
+
+        condensed = "\n".join(f"- {sentence.lstrip('#').strip()}" for _, _, sentence in sorted(kept))
+        print(f"🧩 Condensed study log from ~{estimate_tokens(text)} to ~{estimate_tokens(condensed)} tokens "
+              f"({len(chunks)} chunks)")
+        return condensed
@@ -0,0 +1,171 @@
+# Background transcription jobs with stage-level progress
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from models.transcription_models import TranscriptionJobStatus
+from services.transcription_pool import TranscriptionUnavailableError
+
+EvaluateFn = Callable[..., Awaitable[Any]]
+
+# Stages in pipeline order; progress can arrive late from a worker, so a job never moves backwards
+STAGES = ["queued", "started", "decoded", "segmented", "recognised", "scored", "completed", "failed"]
+
+class _Job:
+    def __init__(self, audio_bytes: bytes, audio_format: str, student_register_number: Optional[str] = None,
+                 engine: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.audio_bytes = audio_bytes
+        self.audio_format = audio_format
+        self.student_register_number = student_register_number
+        self.engine = engine
+        self.status = "queued"
+        self.stage = "queued"
+        self.events: List[Dict[str, Any]] = []
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.monotonic()
+        self.finished: Optional[float] = None
+        self.changed = asyncio.Condition()
+
+    def emit(self, stage: str, detail: Optional[Dict[str, Any]] = None):
+        if STAGES.index(stage) <= STAGES.index(self.stage) and self.events:
+            return
+        self.stage = stage
+        self.events.append({"stage": stage, "elapsed": round(time.monotonic() - self.created, 3), **(detail or {})})
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+    def snapshot(self, queue_position: Optional[int] = None) -> TranscriptionJobStatus:
+        return TranscriptionJobStatus(
+            job_id=self.id,
+            status=self.status,
+            stage=self.stage,
+            events=list(self.events),
+            queue_position=queue_position,
+            result=self.result,
+            error=self.error,
+        )
+
+class TranscriptionJobService:
+    """Queue of transcription jobs that clients poll or follow over SSE.
+
+    Submitted jobs wait in a bounded in-process queue (MAX_PENDING) and are
+    run by CONCURRENCY dispatchers through ``evaluate_fn``, which reports
+    stage events (decoded, segmented, recognised, scored) as the pipeline advances.
+    A full queue rejects new jobs with TranscriptionUnavailableError rather
+    than accepting work it cannot start soon. Finished jobs are kept for
+    RESULT_TTL seconds.
+    """
+
+    MAX_PENDING = int(os.getenv("TRANSCRIPTION_JOB_QUEUE", "32"))
+    CONCURRENCY = int(os.getenv("TRANSCRIPTION_JOB_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+    RESULT_TTL = 900
+
+    def __init__(self, evaluate_fn: EvaluateFn):
+        self.evaluate_fn = evaluate_fn
+        self._jobs: "OrderedDict[str, _Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: List[str] = []
+        self._dispatchers: List[asyncio.Task] = []
+        self._running = 0
+        self._max_depth = 0
+        self._waits: List[float] = []
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.MAX_PENDING)
+            self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.CONCURRENCY)]
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.RESULT_TTL
+        for job_id in [j.id for j in self._jobs.values() if j.finished is not None and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, audio_bytes: bytes, audio_format: str,
+               student_register_number: Optional[str] = None, engine: Optional[str] = None) -> TranscriptionJobStatus:
+        """Queue a job and return its initial status"""
+        self._start()
+        self._expire()
+        job = _Job(audio_bytes, audio_format, student_register_number, engine)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            average = sum(self._waits[-20:]) / len(self._waits[-20:]) if self._waits else 10.0
+            raise TranscriptionUnavailableError("Too many recordings are being processed, please try again shortly",
+                                                retry_after=max(1.0, average))
+        self._jobs[job.id] = job
+        self._pending.append(job.id)
+        self._stats["submitted"] += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        job.emit("queued")
+        return job.snapshot(queue_position=len(self._pending))
+
+    async def _dispatch(self):
+        while True:
+            job = await self._queue.get()
+            self._pending.remove(job.id)
+            self._waits = self._waits[-99:] + [time.monotonic() - job.created]
+            self._running += 1
+            job.status = "running"
+            job.emit("started")
+            try:
+                job.result = await self.evaluate_fn(job.audio_bytes, job.audio_format, progress=job.emit,
+                                                    student_register_number=job.student_register_number,
+                                                    engine=job.engine)
+                job.status = "completed"
+                self._stats["completed"] += 1
+                job.emit("completed")
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self._stats["failed"] += 1
+                job.emit("failed", {"error": str(e)})
+            finally:
+                job.audio_bytes = None  # drop the audio as soon as it is processed
+                job.finished = time.monotonic()
+                self._running -= 1
+                self._queue.task_done()
+
+    def get(self, job_id: str) -> Optional[TranscriptionJobStatus]:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        position = self._pending.index(job_id) + 1 if job_id in self._pending else None
+        return job.snapshot(queue_position=position)
+
+    async def follow(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a job's events as they happen, ending after it completes or fails"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        sent = 0
+        while True:
+            async with job.changed:
+                if sent == len(job.events) and job.finished is None:
+                    await job.changed.wait()
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.finished is not None and sent == len(job.events):
+                return
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self._max_depth,
+            "queue_capacity": self.MAX_PENDING,
+            "running": self._running,
+            "p50_wait_seconds": round(waits[len(waits) // 2], 3) if waits else None,
+        }
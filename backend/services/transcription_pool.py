@@ -0,0 +1,152 @@
+# Runs the audio transcription pipeline in worker processes, off the event loop
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+class TranscriptionUnavailableError(RuntimeError):
+    """The pool is saturated or the job overran its deadline"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+_worker_service = None
+_progress_queue = None
+
+def _warm_up(progress_queue=None):
+    # Import the audio stack once per worker instead of on its first job
+    global _worker_service, _progress_queue
+    from services.transcription_service import TranscriptionService
+    _worker_service = TranscriptionService()
+    _progress_queue = progress_queue
+
+def _run_transcription(audio_bytes: bytes, audio_format: str, locales: Optional[List[str]] = None,
+                       engine: Optional[str] = None, job_key: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    if _worker_service is None:
+        _warm_up()
+
+    progress = None
+    if job_key and _progress_queue is not None:
+        def progress(stage: str, detail: Dict[str, Any]):
+            _progress_queue.put((job_key, stage, detail))
+    return _worker_service._transcribe_audio(audio_bytes, audio_format, progress=progress, locales=locales, engine=engine)
+
+class TranscriptionPool:
+    """Size-bounded process pool for ``TranscriptionService._transcribe_audio``.
+
+    Decoding, filtering and the blocking recognizer calls run in up to
+    MAX_WORKERS spawned processes, so they neither hold the event loop nor
+    compete for the GIL. At most MAX_QUEUE jobs wait behind the running
+    ones; beyond that, and for jobs that miss JOB_DEADLINE seconds, callers
+    get TranscriptionUnavailableError instead of queueing indefinitely.
+    Stage events raised inside a worker travel back over a shared queue and
+    are delivered to the job's ``on_progress`` callback on the event loop.
+    """
+
+    MAX_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+    MAX_QUEUE = int(os.getenv("TRANSCRIPTION_MAX_QUEUE", "16"))
+    JOB_DEADLINE = float(os.getenv("TRANSCRIPTION_DEADLINE", "60"))
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._listeners: Dict[str, tuple] = {}
+        self._in_flight = 0
+        self._durations = []
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs event-loop and gRPC threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.SimpleQueue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.MAX_WORKERS,
+                mp_context=context,
+                initializer=_warm_up,
+                initargs=(self._progress_queue,),
+            )
+            threading.Thread(target=self._relay_progress, args=(self._progress_queue,), daemon=True).start()
+        return self._executor
+
+    def _relay_progress(self, progress_queue):
+        while True:
+            message = progress_queue.get()
+            if message is None:
+                return
+            job_key, stage, detail = message
+            listener = self._listeners.get(job_key)
+            if listener is not None:
+                loop, on_progress = listener
+                loop.call_soon_threadsafe(on_progress, stage, detail)
+
+    def _retry_after(self) -> float:
+        recent = self._durations[-20:]
+        average = sum(recent) / len(recent) if recent else 10.0
+        waiting = max(0, self._in_flight - self.MAX_WORKERS)
+        return max(1.0, average * (waiting + 1) / self.MAX_WORKERS)
+
+    def _job_done(self, started: float, future):
+        # Slots are released when the worker finishes, even if the caller gave up earlier
+        self._in_flight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self._stats["failed"] += 1
+            return
+        self._stats["completed"] += 1
+        self._durations = self._durations[-99:] + [time.monotonic() - started]
+
+    async def run(self, audio_bytes: bytes, audio_format: str, locales: Optional[List[str]] = None,
+                  engine: Optional[str] = None, on_progress: Optional[ProgressFn] = None) -> Tuple[str, Optional[str]]:
+        """Transcribe raw audio bytes in a worker process; returns (transcription, locale)"""
+        if self._in_flight >= self.MAX_WORKERS + self.MAX_QUEUE:
+            self._stats["rejected"] += 1
+            raise TranscriptionUnavailableError("Transcription queue is full, please try again shortly",
+                                                retry_after=self._retry_after())
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        job_key = None
+        if on_progress is not None:
+            job_key = uuid.uuid4().hex
+            self._listeners[job_key] = (loop, on_progress)
+        future = self._get_executor().submit(_run_transcription, audio_bytes, audio_format, locales, engine, job_key)
+        self._in_flight += 1
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._job_done, started, f))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.JOB_DEADLINE)
+        except asyncio.TimeoutError:
+            # A queued job is dropped; a running one finishes in its worker and is discarded
+            future.cancel()
+            self._stats["timed_out"] += 1
+            print(f"⏱️ Transcription exceeded {self.JOB_DEADLINE:.0f}s deadline")
+            raise TranscriptionUnavailableError("Transcription took too long, please try a shorter recording",
+                                                retry_after=self._retry_after())
+        finally:
+            self._listeners.pop(job_key, None)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        recent = sorted(self._durations)
+        return {
+            **self._stats,
+            "workers": self.MAX_WORKERS,
+            "running": min(self._in_flight, self.MAX_WORKERS),
+            "queued": max(0, self._in_flight - self.MAX_WORKERS),
+            "max_queue": self.MAX_QUEUE,
+            "p50_seconds": round(recent[len(recent) // 2], 3) if recent else None,
+        }
@@ -2,11 +2,21 @@ import base64
 import json
 import random
 import re
+import copy
 import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import speech_recognition as sr
-from pydub import AudioSegment
+from services.transcription_pool import TranscriptionPool, TranscriptionUnavailableError
+from services.locale_preference_service import LocalePreferenceService, DEFAULT_LOCALES
+from services.asr_engines import ASREngine, get_engine
+from services.audio_decode import AudioDecodeError, PCMAudio, decode_to_pcm, detect_format, to_audio_data
+from services.vad import speech_segments
+from services import audio_dsp
 from models.transcription_models import (
     TranscriptionEvaluationInput, 
     TranscriptionEvaluationOutput,
@@ -16,21 +26,59 @@ from models.transcription_models import (
 )
 
 class TranscriptionService:
+    # Seconds a single recognizer request may take before it is abandoned
+    RECOGNITION_TIMEOUT = 15
+    # Seconds one recording may spend across all enhancement stages and recognition attempts
+    TIME_BUDGET = float(os.getenv("TRANSCRIPTION_TIME_BUDGET", "30"))
+    # Speech segments of one long recording recognised at the same time
+    SEGMENT_WORKERS = int(os.getenv("TRANSCRIPTION_SEGMENT_WORKERS", "4"))
+    # Recognition requests one worker process has in flight at once, across all segments and locale races
+    RECOGNITION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_RECOGNITION_CONCURRENCY", "4"))
+    # Declared formats that mean headerless 16kHz mono 16-bit PCM
+    RAW_PCM_FORMATS = ("pcm", "raw", "l16")
+    
+    FALLBACK_MESSAGE = "I couldn't understand what you said. Please try again with these tips:\n\n1. **Speak clearly and at a normal pace** - Not too fast, not too slow\n2. **Reduce background noise** - Move to a quieter room if possible\n3. **Get closer to the microphone** - About 6-12 inches away\n4. **Speak for 3-5 seconds** - Longer recordings work better\n5. **Try simple sentences** like 'Hello, my name is John and I like programming'\n\nClick the record button and try again!"
+
     def __init__(self):
-        # Initialize any required dependencies here
-        pass
+        # Audio jobs run in worker processes so they never block the event loop
+        self.pool = TranscriptionPool()
+        self.locales = LocalePreferenceService()
+        # Shared by every request this process makes, so segments x locales cannot fan out past it
+        self._recognition_slots = threading.BoundedSemaphore(self.RECOGNITION_CONCURRENCY)
+    
+    async def evaluate_transcription(self, input_data: TranscriptionEvaluationInput, progress=None) -> TranscriptionEvaluationOutput:
+        """
+        Evaluate base64 encoded audio from a JSON request
+        """
+        try:
+            audio_bytes = base64.b64decode(input_data.audioData)
+        except ValueError as e:
+            print(f"❌ Invalid base64 audio data: {e}")
+            return self._audio_error_output(e)
+        return await self.evaluate_audio(audio_bytes, input_data.format, progress,
+                                         input_data.student_register_number, input_data.engine)
     
-    async def evaluate_transcription(self, input_data: TranscriptionEvaluationInput) -> TranscriptionEvaluationOutput:
+    async def evaluate_audio(self, audio_bytes: bytes, audio_format: str = "webm", progress=None,
+                             student_register_number: Optional[str] = None,
+                             engine: Optional[str] = None) -> TranscriptionEvaluationOutput:
         """
-        Evaluate audio transcription and provide communication analysis
+        Evaluate audio transcription and provide communication analysis.
+        ``progress(stage, detail)`` is called as each stage completes; ``engine``
+        names the ASR engine (the deployment default when omitted).
         """
         try:
             print(f"🎙️ Starting transcription evaluation")
-            print(f"📊 Audio data length: {len(input_data.audioData) if input_data.audioData else 0}")
-            print(f"🎵 Audio format: {input_data.format}")
+            print(f"📊 Audio data size: {len(audio_bytes)} bytes")
+            print(f"🎵 Audio format: {audio_format}")
             
-            # Transcribe the audio
-            transcription = self._transcribe_audio(input_data.audioData, input_data.format)
+            # Transcribe the audio in a worker process, trying the student's best locales first
+            asr = get_engine(engine)
+            locales = asr.supported(self.locales.rank(student_register_number))
+            transcription, locale = await self.pool.run(audio_bytes, audio_format, locales, asr.name, on_progress=progress)
+            if asr.multilingual:
+                self.locales.record(student_register_number, locale)
+            if progress:
+                progress("recognised", {"characters": len(transcription), "locale": locale, "engine": asr.name})
             
             print(f"📝 Raw transcription result: '{transcription}'")
             print(f"📏 Transcription length: {len(transcription)}")
@@ -54,6 +102,8 @@ class TranscriptionService:
             
             # Analyze the transcription for communication skills
             analysis_results = self._analyze_communication_skills(transcription)
+            if progress:
+                progress("scored", {"clarity": analysis_results["clarity"]})
             
             return TranscriptionEvaluationOutput(
                 transcription=transcription,
@@ -65,18 +115,23 @@ class TranscriptionService:
                 analysis=analysis_results["detailed_analysis"]
             )
             
+        except TranscriptionUnavailableError:
+            raise
         except Exception as e:
             # If anything fails, provide a fallback response
-            print(f"❌ Error in evaluate_transcription: {e}")
-            return TranscriptionEvaluationOutput(
-                transcription="Unable to transcribe audio. Please try again.",
-                clarity=50,
-                confidence=50,
-                articulation=50,
-                feedback="There was an error processing your audio. Please check your microphone and try again.",
-                suggestions="Ensure your microphone is working properly and you're speaking clearly.",
-                analysis={"error": str(e)}
-            )
+            print(f"❌ Error in evaluate_audio: {e}")
+            return self._audio_error_output(e)
+    
+    def _audio_error_output(self, error: Exception) -> TranscriptionEvaluationOutput:
+        return TranscriptionEvaluationOutput(
+            transcription="Unable to transcribe audio. Please try again.",
+            clarity=50,
+            confidence=50,
+            articulation=50,
+            feedback="There was an error processing your audio. Please check your microphone and try again.",
+            suggestions="Ensure your microphone is working properly and you're speaking clearly.",
+            analysis={"error": str(error)}
+        )
     
     async def evaluate_text_only(self, input_data: TextEvaluationInput) -> TranscriptionEvaluationOutput:
         """
@@ -120,336 +175,191 @@ class TranscriptionService:
                 analysis={"error": str(e)}
             )
     
-    def _transcribe_audio(self, audio_data: str, audio_format: str = "webm") -> str:
+    def _transcribe_audio(self, audio_bytes: bytes, audio_format: str = "webm", progress=None,
+                          locales: Optional[List[str]] = None, engine: Optional[str] = None) -> Tuple[str, Optional[str]]:
         """
-        Transcribe audio using SpeechRecognition library with enhanced audio quality handling
+        Transcribe audio using SpeechRecognition library with enhanced audio quality handling.
+        Returns the transcription (or a message for the user) and the locale that recognised it.
         """
         try:
-            # Convert audio data to bytes
-            audio_bytes = base64.b64decode(audio_data)
-            
             print(f"🔊 Processing audio format: {audio_format}")
             print(f"📊 Audio data size: {len(audio_bytes)} bytes")
             
             # Check if audio data is too small (likely empty or corrupted)
             if len(audio_bytes) < 1000:  # Less than 1KB is suspicious
                 print(f"⚠️ Audio data too small: {len(audio_bytes)} bytes")
-                return "Audio recording appears to be empty or too short. Please ensure you speak for at least 2-3 seconds."
+                return "Audio recording appears to be empty or too short. Please ensure you speak for at least 2-3 seconds.", None
             
-            # Initialize speech recognition
+            # Initialize speech recognition (energy thresholds only matter when listening
+            # to a live source, so the recorded clip needs just a request timeout)
             r = sr.Recognizer()
-            
-            # Configure recognizer for better sensitivity
-            r.energy_threshold = 300  # Lower threshold for quieter speech
-            r.dynamic_energy_threshold = True
-            r.pause_threshold = 0.8  # Shorter pause threshold
+            r.operation_timeout = self.RECOGNITION_TIMEOUT
             
             # Clean format string
             clean_format = audio_format.split(';')[0].split('/')[1] if '/' in audio_format else audio_format.split(';')[0]
             print(f"🎵 Clean audio format: {clean_format}")
             
             # Try to process audio with multiple methods
-            transcription = self._process_audio_with_multiple_methods(audio_bytes, clean_format, r)
-            
-            return transcription
+            asr = get_engine(engine)
+            return self._process_audio_with_multiple_methods(audio_bytes, clean_format, r, progress,
+                                                             asr.supported(locales or DEFAULT_LOCALES), asr)
                 
         except Exception as e:
             print(f"❌ Error in audio transcription: {e}")
-            return f"Error processing audio: {str(e)}"
+            return f"Error processing audio: {str(e)}", None
     
-    def _process_audio_with_multiple_methods(self, audio_bytes, clean_format, recognizer):
+    def _process_audio_with_multiple_methods(self, audio_bytes, clean_format, recognizer, progress=None,
+                                             locales=DEFAULT_LOCALES, engine: Optional[ASREngine] = None):
         """
-        Try multiple methods to process and transcribe audio
+        Decode once, cut the speech out of the recording, then recognise each segment
         """
-        temp_files = []
+        deadline = time.monotonic() + self.TIME_BUDGET
+        
+        pcm = self._decode_audio(audio_bytes, clean_format)
+        if progress:
+            progress("decoded", {"duration": round(pcm.duration, 2) if pcm else None})
+        if pcm is None:
+            return self.FALLBACK_MESSAGE, None
+        
+        print(f"📊 Audio duration: {pcm.duration:.2f} seconds")
+        if pcm.duration < 1.0:
+            return f"Audio recording is too short ({pcm.duration:.1f} seconds). Please speak for at least 2-3 seconds.", None
+        
+        engine = engine or get_engine()
+        
+        # Only the speech goes to recognition: silence is trimmed and long recordings are split at pauses
+        segments = speech_segments(pcm)
+        speech = sum(segment.duration for segment in segments)
+        print(f"🗣️ {speech:.2f}s of speech in {len(segments)} segment(s)")
+        if progress:
+            progress("segmented", {"speech_duration": round(speech, 2), "segments": len(segments)})
+        if not segments:
+            return self.FALLBACK_MESSAGE, None
         
         try:
-            # Method 1: Direct processing with conversion
-            transcription = self._try_direct_processing(audio_bytes, clean_format, recognizer, temp_files)
-            if transcription and not self._is_fallback_message(transcription):
-                return transcription
-            
-            # Method 2: Enhanced audio processing
-            transcription = self._try_enhanced_processing(audio_bytes, clean_format, recognizer, temp_files)
-            if transcription and not self._is_fallback_message(transcription):
-                return transcription
-            
-            # Method 3: Simple fallback
-            transcription = self._try_simple_fallback(audio_bytes, recognizer)
-            if transcription and not self._is_fallback_message(transcription):
-                return transcription
-            
-            # If all methods fail, return the fallback message
-            return "I couldn't understand what you said. Please try again with these tips:\n\n1. **Speak clearly and at a normal pace** - Not too fast, not too slow\n2. **Reduce background noise** - Move to a quieter room if possible\n3. **Get closer to the microphone** - About 6-12 inches away\n4. **Speak for 3-5 seconds** - Longer recordings work better\n5. **Try simple sentences** like 'Hello, my name is John and I like programming'\n\nClick the record button and try again!"
-            
-        finally:
-            # Clean up temporary files
-            import os
-            for filename in temp_files:
-                try:
-                    if os.path.exists(filename):
-                        os.remove(filename)
-                        print(f"🧹 Cleaned up: {filename}")
-                except Exception as cleanup_error:
-                    print(f"⚠️ Failed to cleanup {filename}: {cleanup_error}")
+            if len(segments) == 1:
+                result = self._recognize_clip(segments[0], recognizer, locales, engine, deadline)
+            else:
+                result = self._recognize_segments(segments, recognizer, locales, engine, deadline)
+            if result:
+                return result
+                
+        except sr.RequestError as e:
+            print(f"⚠️ {engine.label} request error: {e}")
+            # Every further attempt would hit the same network failure
+            return f"Speech recognition service unavailable. Please check your internet connection and try again. Error: {str(e)}", None
+        
+        # If all stages fail, return the fallback message
+        return self.FALLBACK_MESSAGE, None
     
-    def _try_direct_processing(self, audio_bytes, clean_format, recognizer, temp_files):
-        """
-        Try direct audio processing with format conversion
-        """
-        try:
-            print("🔄 Method 1: Direct processing with conversion")
-            
-            # Create a temporary file with the original audio data
-            temp_filename = f"temp_audio_{clean_format}.{clean_format}"
-            temp_files.append(temp_filename)
-            
-            with open(temp_filename, "wb") as f:
-                f.write(audio_bytes)
-            
-            print(f"✅ Audio saved as: {temp_filename}")
-            
-            # For webm/ogg formats, try to convert to WAV using pydub (if ffmpeg is available)
-            if clean_format.lower() in ['webm', 'ogg', 'mp4']:
-                try:
-                    print(f"🔄 Converting {clean_format} to WAV...")
-                    
-                    # Test if ffmpeg is available
-                    import subprocess
-                    try:
-                        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-                        print("✅ ffmpeg is available")
-                        
-                        # Load the audio file
-                        audio = AudioSegment.from_file(temp_filename, format=clean_format)
-                        
-                        # Export as WAV
-                        wav_filename = f"temp_converted_{clean_format}.wav"
-                        temp_files.append(wav_filename)
-                        
-                        audio.export(wav_filename, format="wav")
-                        print(f"✅ Successfully converted to WAV: {wav_filename}")
-                        
-                        # Use the converted WAV file
-                        temp_filename = wav_filename
-                        clean_format = "wav"
-                        
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        print("⚠️ ffmpeg not available, trying direct processing without conversion")
-                        # Continue with original format
-                    except Exception as conversion_error:
-                        print(f"⚠️ Conversion failed: {conversion_error}")
-                        # Continue with original format
-                        
-                except ImportError:
-                    print("⚠️ pydub not available, trying direct processing")
-                except Exception as conversion_error:
-                    print(f"⚠️ Conversion setup failed: {conversion_error}")
-                    # Continue with original format
-            
-            # Try to get audio info and transcribe
+    def _recognize_clip(self, pcm, recognizer, locales, engine, deadline=None) -> Optional[Tuple[str, str]]:
+        """
+        Run the enhancement stages on one clip until it is understood.
+        Stages use the first (preferred) locale; the others are raced on the original audio last.
+        Returns (transcription, locale) or None; raises sr.RequestError.
+        """
+        preferred = locales[0]
+        original_audio = None
+        for stage, prepare in self._enhancement_stages():
+            if self._budget_exhausted(recognizer, deadline):
+                break
+            print(f"🔄 Stage: {stage}")
             try:
-                with sr.AudioFile(temp_filename) as source:
-                    print(f"📈 Audio sample rate: {source.SAMPLE_RATE}")
-                    print(f"📈 Audio channels: {source.CHANNELS}")
-                    
-                    # Adjust for ambient noise
-                    recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                    
-                    # Record the audio
-                    audio_recorded = recognizer.record(source)
-                    
-                    # Calculate duration
-                    duration = len(audio_recorded.frame_data) / (source.SAMPLE_RATE * source.SAMPLE_WIDTH * source.CHANNELS)
-                    print(f"📊 Audio duration: {duration:.2f} seconds")
-                    
-                    # Check if duration is too short
-                    if duration < 1.0:
-                        return f"Audio recording is too short ({duration:.1f} seconds). Please speak for at least 2-3 seconds."
-                    
-                    # Try speech recognition
-                    transcription = self._try_recognition_with_retries(recognizer, audio_recorded)
-                    print(f"✅ Direct processing successful: '{transcription}'")
-                    return transcription
-                    
-            except Exception as audio_error:
-                print(f"⚠️ Audio processing failed: {audio_error}")
-                # Try to create a simple WAV file as fallback
-                return self._create_simple_wav_fallback(audio_bytes, recognizer, temp_files)
-                
-        except Exception as error:
-            print(f"⚠️ Direct processing failed: {error}")
+                audio_data = to_audio_data(prepare(pcm))
+            except Exception as stage_error:
+                print(f"⚠️ {stage} stage failed: {stage_error}")
+                continue
+            if original_audio is None:
+                original_audio = audio_data
+            
+            transcription = self._recognize(recognizer, audio_data, preferred, engine)
+            if transcription:
+                print(f"✅ {stage} stage successful: '{transcription}'")
+                return transcription, preferred
+        
+        # Other English locales, on the unprocessed audio (its FLAC encoding is reused)
+        if original_audio is not None and len(locales) > 1:
+            return self._try_alternative_recognition(recognizer, original_audio, locales[1:], deadline, engine)
+        return None
+    
+    def _recognize_segments(self, segments, recognizer, locales, engine, deadline=None) -> Optional[Tuple[str, str]]:
+        """
+        Recognise speech segments in parallel and join them in order.
+        Segments nobody understood are left out; returns None if none were understood.
+        """
+        print(f"✂️ Recognising {len(segments)} segments in parallel...")
+        with ThreadPoolExecutor(max_workers=min(len(segments), self.SEGMENT_WORKERS)) as executor:
+            # Each segment gets its own recognizer, since the time budget adjusts its timeout
+            futures = [executor.submit(self._recognize_clip, segment, copy.copy(recognizer), locales, engine, deadline)
+                       for segment in segments]
+            results = []
+            request_error = None
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except sr.RequestError as e:
+                    request_error = e
+                    results.append(None)
+        
+        understood = [result for result in results if result]
+        if not understood:
+            if request_error is not None:
+                raise request_error
             return None
+        print(f"✅ Understood {len(understood)}/{len(segments)} segments")
+        # The locale that understood most of the recording is the one to remember
+        locales_used = [locale for _, locale in understood]
+        return " ".join(text for text, _ in understood), max(set(locales_used), key=locales_used.count)
     
-    def _create_simple_wav_fallback(self, audio_bytes, recognizer, temp_files):
+    def _decode_audio(self, audio_bytes, clean_format) -> Optional[PCMAudio]:
         """
-        Create a simple WAV file as fallback when direct processing fails
+        Decode the upload to PCM, or None if it cannot be decoded
         """
+        detected = detect_format(audio_bytes)
+        if detected is None:
+            # Headerless 16kHz mono PCM has no magic bytes, so it is only accepted when declared;
+            # anything else without a known container is corrupt or unsupported
+            if clean_format.lower() in self.RAW_PCM_FORMATS:
+                return PCMAudio(audio_bytes)
+            print(f"⚠️ Unrecognised audio container (declared {clean_format})")
+            return None
+        if detected != clean_format:
+            print(f"🔎 Detected {detected} audio (declared {clean_format})")
+        
         try:
-            print("🔄 Creating simple WAV fallback...")
-            
-            wav_filename = "temp_simple_fallback.wav"
-            temp_files.append(wav_filename)
-            
-            with open(wav_filename, "wb") as f:
-                # Simple WAV header for 16kHz mono PCM
-                sample_rate = 16000
-                channels = 1
-                bits_per_sample = 16
-                
-                # Calculate file sizes
-                byte_rate = sample_rate * channels * bits_per_sample // 8
-                block_align = channels * bits_per_sample // 8
-                data_size = len(audio_bytes)
-                file_size = 36 + data_size
-                
-                # Write WAV header
-                f.write(b'RIFF')
-                f.write(file_size.to_bytes(4, 'little'))
-                f.write(b'WAVE')
-                f.write(b'fmt ')
-                f.write((16).to_bytes(4, 'little'))  # Subchunk1Size
-                f.write((1).to_bytes(2, 'little'))   # AudioFormat (PCM)
-                f.write(channels.to_bytes(2, 'little'))
-                f.write(sample_rate.to_bytes(4, 'little'))
-                f.write(byte_rate.to_bytes(4, 'little'))
-                f.write(block_align.to_bytes(2, 'little'))
-                f.write(bits_per_sample.to_bytes(2, 'little'))
-                f.write(b'data')
-                f.write(data_size.to_bytes(4, 'little'))
-                f.write(audio_bytes)
-            
-            print(f"✅ Created simple WAV file: {wav_filename}")
-            
-            # Try to process the WAV file
-            with sr.AudioFile(wav_filename) as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio_recorded = recognizer.record(source)
-            
-            transcription = self._try_recognition_with_retries(recognizer, audio_recorded)
-            print(f"✅ Simple WAV fallback successful: '{transcription}'")
-            return transcription
-            
-        except Exception as error:
-            print(f"⚠️ Simple WAV fallback failed: {error}")
+            pcm = decode_to_pcm(audio_bytes, detected)
+            print(f"✅ Decoded {detected} to PCM: {pcm.duration:.2f}s at {pcm.sample_rate} Hz")
+            return pcm
+        except AudioDecodeError as decode_error:
+            print(f"⚠️ Could not decode {detected}: {decode_error}")
             return None
     
-    def _try_enhanced_processing(self, audio_bytes, clean_format, recognizer, temp_files):
+    def _enhancement_stages(self):
         """
-        Try enhanced audio processing with pydub (if ffmpeg is available)
+        (name, PCM transform) pairs, tried in order on the decoded audio
         """
-        try:
-            print("🔄 Method 2: Enhanced audio processing")
-            
-            # Check if ffmpeg is available
-            import subprocess
-            try:
-                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-                print("✅ ffmpeg is available for enhanced processing")
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                print("⚠️ ffmpeg not available, skipping enhanced processing")
-                return None
-            
-            # Create a temporary file
-            temp_filename = f"temp_enhanced_{clean_format}.{clean_format}"
-            temp_files.append(temp_filename)
-            
-            with open(temp_filename, "wb") as f:
-                f.write(audio_bytes)
-            
-            # Load with pydub for enhancement
-            audio = AudioSegment.from_file(temp_filename, format=clean_format)
-            
-            # Enhance audio quality
-            print("🎚️ Enhancing audio quality...")
-            
-            # Increase volume if too quiet
-            if audio.dBFS < -20:
-                audio = audio + 6
-                print("🔊 Increased audio volume")
-            
-            # Apply high-pass filter to reduce low-frequency noise
-            audio = audio.high_pass_filter(200)
-            print("🔇 Applied high-pass filter")
-            
-            # Export enhanced audio
-            enhanced_filename = f"temp_enhanced_{clean_format}_enhanced.wav"
-            temp_files.append(enhanced_filename)
-            
-            audio.export(enhanced_filename, format="wav")
-            print(f"✅ Enhanced audio saved: {enhanced_filename}")
-            
-            # Try to transcribe enhanced audio
-            with sr.AudioFile(enhanced_filename) as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio_recorded = recognizer.record(source)
-                
-                transcription = self._try_recognition_with_retries(recognizer, audio_recorded)
-                print(f"✅ Enhanced processing successful: '{transcription}'")
-                return transcription
-                
-        except Exception as error:
-            print(f"⚠️ Enhanced processing failed: {error}")
-            return None
+        return [
+            ("direct", lambda pcm: pcm),
+            ("enhanced", self._enhance_pcm),
+            ("boosted", lambda pcm: self._enhance_pcm(pcm, target_dbfs=-14, max_gain_db=30, cutoff_hz=300)),
+        ]
     
-    def _try_simple_fallback(self, audio_bytes, recognizer):
+    def _enhance_pcm(self, pcm: PCMAudio, target_dbfs=-20.0, max_gain_db=20.0, cutoff_hz=200) -> PCMAudio:
         """
-        Try simple fallback method
+        Cut low-frequency noise, then bring the speech to ``target_dbfs`` (boosting by at most
+        ``max_gain_db``) without clipping its peaks
         """
-        try:
-            print("🔄 Method 3: Simple fallback")
-            
-            # Try to create a simple WAV file manually
-            wav_path = "temp_simple_fallback.wav"
-            
-            with open(wav_path, "wb") as f:
-                # Simple WAV header for 16kHz mono PCM
-                sample_rate = 16000
-                channels = 1
-                bits_per_sample = 16
-                
-                # Calculate file sizes
-                byte_rate = sample_rate * channels * bits_per_sample // 8
-                block_align = channels * bits_per_sample // 8
-                data_size = len(audio_bytes)
-                file_size = 36 + data_size
-                
-                # Write WAV header
-                f.write(b'RIFF')
-                f.write(file_size.to_bytes(4, 'little'))
-                f.write(b'WAVE')
-                f.write(b'fmt ')
-                f.write((16).to_bytes(4, 'little'))  # Subchunk1Size
-                f.write((1).to_bytes(2, 'little'))   # AudioFormat (PCM)
-                f.write(channels.to_bytes(2, 'little'))
-                f.write(sample_rate.to_bytes(4, 'little'))
-                f.write(byte_rate.to_bytes(4, 'little'))
-                f.write(block_align.to_bytes(2, 'little'))
-                f.write(bits_per_sample.to_bytes(2, 'little'))
-                f.write(b'data')
-                f.write(data_size.to_bytes(4, 'little'))
-                f.write(audio_bytes)
-            
-            print(f"✅ Created simple WAV file: {wav_path}")
-            
-            # Try to process the WAV file
-            with sr.AudioFile(wav_path) as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio_recorded = recognizer.record(source)
-            
-            transcription = self._try_recognition_with_retries(recognizer, audio_recorded)
-            print(f"✅ Simple fallback successful: '{transcription}'")
-            
-            # Clean up
-            import os
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
-            
-            return transcription
-            
-        except Exception as error:
-            print(f"⚠️ Simple fallback failed: {error}")
-            return None
+        samples = audio_dsp.to_float(pcm.frames, pcm.sample_width, pcm.channels)
+        
+        # Filter first so hum and DC offset do not count towards the level being normalised
+        samples = audio_dsp.high_pass(samples, pcm.sample_rate, cutoff_hz)
+        print("🔇 Applied high-pass filter")
+        
+        before = audio_dsp.level_dbfs(samples)
+        samples = audio_dsp.normalise(samples, target_dbfs, max_gain_db)
+        print(f"🔊 Normalised level from {before:.1f} to {audio_dsp.level_dbfs(samples):.1f} dBFS")
+        
+        return PCMAudio(audio_dsp.to_int16(samples), pcm.sample_rate)
     
     def _is_fallback_message(self, transcription):
         """
@@ -466,62 +376,43 @@ class TranscriptionService:
         
         return any(re.search(pattern, transcription.lower()) for pattern in fallback_patterns)
     
-    def _try_recognition_with_retries(self, recognizer, audio_data) -> str:
+    def _budget_exhausted(self, recognizer, deadline) -> bool:
         """
-        Try speech recognition with multiple attempts and different methods
+        True once the request's time budget is spent; otherwise caps the next request's timeout to what is left
         """
-        max_attempts = 3
-        attempts = 0
-        
-        while attempts < max_attempts:
-            try:
-                print(f"🎤 Attempt {attempts + 1}/{max_attempts} - Google Speech Recognition...")
-                
-                # Try with different settings each attempt
-                if attempts == 0:
-                    # First attempt: standard
-                    transcription = recognizer.recognize_google(audio_data)
-                elif attempts == 1:
-                    # Second attempt: with language hint and more sensitive settings
-                    recognizer.energy_threshold = max(100, recognizer.energy_threshold - 50)
-                    transcription = recognizer.recognize_google(audio_data, language="en-US")
-                else:
-                    # Third attempt: with show_all to get alternatives and even more sensitive
-                    recognizer.energy_threshold = max(50, recognizer.energy_threshold - 30)
-                    result = recognizer.recognize_google(audio_data, show_all=True)
-                    if result and isinstance(result, list) and len(result) > 0:
-                        transcription = result[0]['transcript']
-                    else:
-                        raise sr.UnknownValueError("No alternatives found")
-                
-                # Validate the transcription
-                if self._is_valid_transcription(transcription):
-                    print(f"✅ Google Speech Recognition successful: '{transcription}'")
-                    return transcription
-                else:
-                    print(f"⚠️ Invalid transcription detected: '{transcription}'")
-                    raise sr.UnknownValueError("Invalid transcription result")
-                
-            except sr.UnknownValueError:
-                print(f"⚠️ Attempt {attempts + 1} failed: Could not understand audio")
-                attempts += 1
-                
-                # Try to adjust audio settings between attempts
-                if attempts < max_attempts:
-                    print("🔧 Adjusting audio sensitivity...")
-                    recognizer.energy_threshold = max(100, recognizer.energy_threshold - 50)
-                    
-            except sr.RequestError as e:
-                print(f"⚠️ Google Speech Recognition request error: {e}")
-                # For network errors, don't retry immediately
-                return f"Speech recognition service unavailable. Please check your internet connection and try again. Error: {str(e)}"
-                
-            except Exception as e:
-                print(f"❌ Unexpected recognition error: {e}")
-                attempts += 1
+        if deadline is None:
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print("⏱️ Time budget exhausted, skipping further recognition attempts")
+            return True
+        recognizer.operation_timeout = min(self.RECOGNITION_TIMEOUT, remaining)
+        return False
+    
+    def _recognize(self, recognizer, audio_data, language="en-US", engine: Optional[ASREngine] = None) -> Optional[str]:
+        """
+        One recognition request; returns the first valid alternative, or None.
+        Raises sr.RequestError on network, quota or engine failures.
+        """
+        engine = engine or get_engine()
+        # A slot is waited for no longer than the request itself may take
+        if not self._recognition_slots.acquire(timeout=recognizer.operation_timeout or self.RECOGNITION_TIMEOUT):
+            print(f"⏱️ No recognition slot free in time ({language})")
+            return None
+        try:
+            print(f"🎤 {engine.label} ({language})...")
+            alternatives = engine.alternatives(recognizer, audio_data, language)
+        except sr.UnknownValueError:
+            print(f"⚠️ Could not understand audio ({language})")
+            return None
+        finally:
+            self._recognition_slots.release()
         
-        # If all attempts failed, try alternative recognition methods
-        return self._try_alternative_recognition(recognizer, audio_data)
+        for transcript in alternatives:
+            if self._is_valid_transcription(transcript):
+                return transcript
+        print(f"⚠️ No valid transcription among {len(alternatives)} alternatives ({language})")
+        return None
     
     def _is_valid_transcription(self, transcription):
         """
@@ -555,96 +446,39 @@ class TranscriptionService:
         
         return not any(re.search(pattern, cleaned) for pattern in fallback_patterns)
     
-    def _try_alternative_recognition(self, recognizer, audio_data) -> str:
+    def _try_alternative_recognition(self, recognizer, audio_data, locales, deadline=None,
+                                     engine: Optional[ASREngine] = None) -> Optional[Tuple[str, str]]:
         """
-        Try alternative recognition methods when Google fails
+        Race the other locales concurrently; the first valid transcription wins.
+        Returns (transcription, locale) or None.
         """
+        if self._budget_exhausted(recognizer, deadline):
+            return None
+        print(f"🌍 Trying {', '.join(locales)} concurrently...")
+        
+        executor = ThreadPoolExecutor(max_workers=len(locales))
+        futures = {executor.submit(self._recognize, recognizer, audio_data, lang, engine): lang for lang in locales}
+        request_error = None
         try:
-            print("🔄 Trying alternative recognition methods...")
-            
-            # Method 1: Try with different energy thresholds
-            try:
-                print("🔧 Trying with different energy thresholds...")
-                original_threshold = recognizer.energy_threshold
-                
-                # Try with very low threshold
-                recognizer.energy_threshold = 50
-                transcription = recognizer.recognize_google(audio_data, language="en-US")
-                
-                if self._is_valid_transcription(transcription):
-                    print(f"✅ Alternative recognition successful: '{transcription}'")
-                    return transcription
-                
-                # Restore original threshold
-                recognizer.energy_threshold = original_threshold
-                
-            except Exception as threshold_error:
-                print(f"⚠️ Energy threshold adjustment failed: {threshold_error}")
-            
-            # Method 2: Try audio enhancement
-            try:
-                print("🎚️ Trying audio enhancement...")
-                
-                # Convert to AudioSegment for processing
-                import io
-                
-                # Get raw audio data
-                if hasattr(audio_data, 'get_raw_data'):
-                    raw_data = audio_data.get_raw_data()
-                else:
-                    raw_data = audio_data.frame_data
-                
-                # Try to create a new audio segment with adjusted volume
-                audio_segment = AudioSegment(
-                    raw_data,
-                    frame_rate=audio_data.sample_rate if hasattr(audio_data, 'sample_rate') else 16000,
-                    sample_width=audio_data.sample_width if hasattr(audio_data, 'sample_width') else 2,
-                    channels=audio_data.channel_count if hasattr(audio_data, 'channel_count') else 1
-                )
-                
-                # Enhance audio
-                audio_segment = audio_segment + 6  # Increase volume by 6dB
-                audio_segment = audio_segment.high_pass_filter(300)  # Remove low-frequency noise
-                
-                # Export to bytes
-                enhanced_audio_bytes = io.BytesIO()
-                audio_segment.export(enhanced_audio_bytes, format="wav")
-                enhanced_audio_bytes.seek(0)
-                
-                # Try recognition with enhanced audio
-                with sr.AudioFile(enhanced_audio_bytes) as source:
-                    enhanced_audio = recognizer.record(source)
-                    
-                transcription = recognizer.recognize_google(enhanced_audio, language="en-US")
-                
-                if self._is_valid_transcription(transcription):
-                    print(f"✅ Enhanced recognition successful: '{transcription}'")
-                    return transcription
-                
-            except Exception as enhance_error:
-                print(f"⚠️ Audio enhancement failed: {enhance_error}")
-            
-            # Method 3: Try with different language settings
-            try:
-                print("🌍 Trying with different language settings...")
-                
-                # Try with different English variants
-                for lang in ["en-GB", "en-AU", "en-IN"]:
-                    try:
-                        transcription = recognizer.recognize_google(audio_data, language=lang)
-                        if self._is_valid_transcription(transcription):
-                            print(f"✅ Recognition with {lang} successful: '{transcription}'")
-                            return transcription
-                    except:
-                        continue
-                        
-            except Exception as lang_error:
-                print(f"⚠️ Language variation attempts failed: {lang_error}")
-                
-        except Exception as e:
-            print(f"❌ Alternative recognition failed: {e}")
+            timeout = deadline - time.monotonic() if deadline else None
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    transcription = future.result()
+                except sr.RequestError as e:
+                    request_error = e
+                    continue
+                if transcription:
+                    print(f"✅ Recognition with {futures[future]} successful: '{transcription}'")
+                    return transcription, futures[future]
+        except FuturesTimeoutError:
+            print("⏱️ Time budget exhausted while waiting for other locales")
+            return None
+        finally:
+            # Requests still in flight finish in the background (bounded by operation_timeout) and are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        # If all alternative methods fail, return None to trigger fallback
+        if request_error is not None:
+            raise request_error
         return None
     
     def _analyze_communication_skills(self, transcription: str) -> Dict[str, Any]:
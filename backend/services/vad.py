@@ -0,0 +1,100 @@
+# Energy / zero-crossing voice-activity detection on decoded PCM
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from services.audio_decode import PCMAudio
+
+FRAME_SECONDS = 0.03
+# Silence shorter than this stays inside a speech region
+MIN_PAUSE_SECONDS = 0.3
+# Padding kept around each region so word onsets and tails are not clipped
+PAD_SECONDS = 0.15
+MIN_SPEECH_SECONDS = 0.25
+# Longest segment sent in one recognition request
+MAX_SEGMENT_SECONDS = float(os.getenv("TRANSCRIPTION_SEGMENT_SECONDS", "15"))
+# Frames this far above the noise floor are speech; unvoiced consonants need less energy but a high ZCR
+SPEECH_MARGIN_DB = 10.0
+FRICATIVE_MARGIN_DB = 5.0
+FRICATIVE_ZCR = 0.25
+# Anything quieter than this is silence regardless of the noise floor
+ABSOLUTE_FLOOR_DBFS = -55.0
+
+def frame_features(samples: np.ndarray, frame_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame RMS level (dBFS) and zero-crossing rate"""
+    count = len(samples) // frame_length
+    frames = samples[:count * frame_length].reshape(count, frame_length).astype(np.float64) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    level = 20 * np.log10(np.maximum(rms, 1e-10))
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return level, zcr
+
+def speech_mask(level: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+    """Boolean speech flag per frame, relative to the clip's own noise floor"""
+    floor = np.percentile(level, 10)
+    if np.percentile(level, 90) - floor < FRICATIVE_MARGIN_DB:
+        # No quiet frames to calibrate against: the clip is all speech or all silence
+        return level > ABSOLUTE_FLOOR_DBFS
+    voiced = level > floor + SPEECH_MARGIN_DB
+    unvoiced = (level > floor + FRICATIVE_MARGIN_DB) & (zcr > FRICATIVE_ZCR)
+    return (voiced | unvoiced) & (level > ABSOLUTE_FLOOR_DBFS)
+
+def _regions(mask: np.ndarray, frame_seconds: float) -> List[Tuple[int, int]]:
+    """[start, end) frame ranges of speech, with short pauses bridged and blips dropped"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    merged: List[List[int]] = []
+    for start, end in zip(starts, ends):
+        if merged and (start - merged[-1][1]) * frame_seconds < MIN_PAUSE_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged if (e - s) * frame_seconds >= MIN_SPEECH_SECONDS]
+
+def _split_long(start: int, end: int, level: np.ndarray, max_frames: int) -> List[Tuple[int, int]]:
+    """Cut a region longer than ``max_frames`` at its quietest frames"""
+    if end - start <= max_frames:
+        return [(start, end)]
+    # Search the middle half so neither piece is tiny
+    lo, hi = start + (end - start) // 4, start + 3 * (end - start) // 4
+    cut = lo + int(np.argmin(level[lo:hi]))
+    return _split_long(start, cut, level, max_frames) + _split_long(cut, end, level, max_frames)
+
+def speech_segments(pcm: PCMAudio, max_seconds: float = None) -> List[PCMAudio]:
+    """Speech in ``pcm`` with leading, trailing and long internal silence removed.
+
+    Regions are packed into segments of at most ``max_seconds`` (cutting only
+    at pauses unless one region is itself too long), so each segment can be
+    recognised on its own. Returns [] when no speech is found, and the clip
+    unchanged when it is not 16-bit mono.
+    """
+    if pcm.sample_width != 2 or pcm.channels != 1:
+        return [pcm]
+    max_seconds = max_seconds or MAX_SEGMENT_SECONDS
+    samples = np.frombuffer(pcm.frames[:len(pcm.frames) // 2 * 2], dtype=np.int16)
+    frame_length = max(1, int(pcm.sample_rate * FRAME_SECONDS))
+    if len(samples) < frame_length:
+        return [pcm]
+    frame_seconds = frame_length / pcm.sample_rate
+
+    level, zcr = frame_features(samples, frame_length)
+    max_frames = max(1, int(max_seconds / frame_seconds))
+    pad = int(PAD_SECONDS / frame_seconds)
+    regions, previous_end = [], 0
+    for start, end in _regions(speech_mask(level, zcr), frame_seconds):
+        start, end = max(previous_end, start - pad), min(len(level), end + pad)
+        regions += _split_long(start, end, level, max_frames)
+        previous_end = end
+
+    # Pack neighbouring regions into segments, dropping the silence between them
+    segments: List[List[Tuple[int, int]]] = []
+    for region in regions:
+        if segments and sum(e - s for s, e in segments[-1]) + region[1] - region[0] <= max_frames:
+            segments[-1].append(region)
+        else:
+            segments.append([region])
+
+    return [PCMAudio(b"".join(samples[s * frame_length:e * frame_length].tobytes() for s, e in segment),
+                     pcm.sample_rate) for segment in segments]
@@ -3,6 +3,7 @@
 Test script to verify transcription service functionality
 """
 
+import base64
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,13 +19,14 @@ def test_transcription_service():
     
     # Test with a very small base64 audio sample (this will likely fail but show us the process)
     # This is just to test the service structure
-    test_audio_data = "UklGRiQAAABXQVZFZm10IBAAAAABAAEARKwAAIhYAQACABAAZGF0YQAAAAA="  # Very small audio sample
+    test_audio_data = base64.b64decode("UklGRiQAAABXQVZFZm10IBAAAAABAAEARKwAAIhYAQACABAAZGF0YQAAAAA=")  # Very small audio sample
     test_format = "webm"
     
     try:
         print("🔊 Testing with sample audio data...")
-        result = service._transcribe_audio(test_audio_data, test_format)
+        result, locale = service._transcribe_audio(test_audio_data, test_format)
         print(f"📝 Transcription result: {result}")
+        print(f"🌐 Recognised locale: {locale}")
         
         # Check if it's a fallback message
         is_fallback = service._is_fallback_message(result)
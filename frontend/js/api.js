@@ -3,9 +3,12 @@ const API_BASE_URL = 'http://localhost:8000';
 const ENDPOINTS = {
   QUIZ_GENERATE: '/quiz/generate',
   QUIZ_EVALUATE: '/quiz/evaluate',
+  QUIZ_SUBMIT: '/quiz/submit',
   CODING_GENERATE: '/coding/generate',
   CODING_EVALUATE: '/coding/evaluate',
+  CODING_SUBMIT: '/coding/submit',
   TRANSCRIPTION_EVALUATE: '/transcription/evaluate',
+  TRANSCRIPTION_UPLOAD: '/transcription/upload',
   COMMUNICATION_HISTORY: '/communication/save-history',
   STUDY_LOGS_CREATE: '/api/study-logs/create',
   STUDY_LOGS_USER: '/api/study-logs/user',
@@ -108,13 +111,21 @@ class APIService {
     });
   }
 
+  // Evaluates and records the result in one request
+  async submitQuiz(data) {
+    return this.request(ENDPOINTS.QUIZ_SUBMIT, {
+      method: 'POST',
+      body: data
+    });
+  }
+
   // Coding API methods
-  async generateCoding({ topic, level }) {
+  async generateCoding({ topic, level, studentRegisterNumber = null }) {
     console.log('Sending generateCoding request with:', { topic, level });
     try {
       const response = await this.request(ENDPOINTS.CODING_GENERATE, {
         method: 'POST',
-        body: { topic, level }
+        body: { topic, level, student_register_number: studentRegisterNumber }
       });
       console.log('generateCoding response:', response);
       return response;
@@ -131,6 +142,14 @@ class APIService {
     });
   }
 
+  // Evaluates and records the result in one request
+  async submitCoding(data) {
+    return this.request(ENDPOINTS.CODING_SUBMIT, {
+      method: 'POST',
+      body: data
+    });
+  }
+
   // Transcription/Communication API methods
   async evaluateTranscription(audioData, format = 'webm') {
     console.log('Sending evaluateTranscription request with audio data length:', audioData?.length);
@@ -150,6 +169,19 @@ class APIService {
     }
   }
 
+  async uploadAudio(audioBlob, format = audioBlob.type || 'webm', studentRegisterNumber = null) {
+    const formData = new FormData();
+    formData.append('audio', audioBlob, 'recording.webm');
+    formData.append('format', format);
+    if (studentRegisterNumber) {
+      formData.append('student_register_number', studentRegisterNumber);
+    }
+    return this.request(ENDPOINTS.TRANSCRIPTION_UPLOAD, {
+      method: 'POST',
+      body: formData
+    });
+  }
+
   async saveCommunicationHistory(historyData) {
     console.log('Sending saveCommunicationHistory request:', historyData);
     try {
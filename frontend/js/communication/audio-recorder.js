@@ -214,12 +214,9 @@ class AudioRecorder {
                 type: this.mediaRecorder.mimeType 
             });
             
-            // Convert to base64 for API submission
-            const base64Audio = await this.blobToBase64(audioBlob);
-            
+            // The blob is uploaded as binary (see APIService.uploadAudio), so no base64 copy is made
             const audioData = {
                 blob: audioBlob,
-                base64: base64Audio,
                 format: this.mediaRecorder.mimeType,
                 duration: await this.getAudioDuration(audioBlob),
                 size: audioBlob.size
@@ -234,21 +231,6 @@ class AudioRecorder {
         }
     }
 
-    /**
-     * Convert blob to base64
-     */
-    blobToBase64(blob) {
-        return new Promise((resolve, reject) => {
-            const reader = new FileReader();
-            reader.onload = () => {
-                const base64 = reader.result.split(',')[1]; // Remove data URL prefix
-                resolve(base64);
-            };
-            reader.onerror = reject;
-            reader.readAsDataURL(blob);
-        });
-    }
-
     /**
      * Get audio duration from blob
      */
@@ -305,7 +287,7 @@ class AudioRecorder {
             mediaRecorder: typeof MediaRecorder !== 'undefined',
             audioContext: typeof (window.AudioContext || window.webkitAudioContext) !== 'undefined',
             getUserMedia: typeof navigator?.mediaDevices?.getUserMedia !== 'undefined',
-            fileReader: typeof FileReader !== 'undefined',
+            formData: typeof FormData !== 'undefined',
             blob: typeof Blob !== 'undefined'
         };
         
@@ -1,3 +1,6 @@
+import { apiService } from '../api.js';
+import { getStudentRegisterNumber } from '../utils.js';
+
 class TranscriptionTest {
     constructor() {
         this.mediaRecorder = null;
@@ -54,7 +57,7 @@ class TranscriptionTest {
             speechRecognition: 'SpeechRecognition' in window,
             webAudio: 'AudioContext' in window || 'webkitAudioContext' in window,
             blob: 'Blob' in window,
-            fileReader: 'FileReader' in window,
+            formData: 'FormData' in window,
             localStorage: 'localStorage' in window,
             fetch: 'fetch' in window
         };
@@ -62,7 +65,7 @@ class TranscriptionTest {
         console.log('📊 Browser compatibility check:', compatibility);
         
         // Check for critical features
-        const criticalFeatures = ['mediaDevices', 'getUserMedia', 'blob', 'fileReader', 'localStorage', 'fetch'];
+        const criticalFeatures = ['mediaDevices', 'getUserMedia', 'blob', 'formData', 'localStorage', 'fetch'];
         const missingCriticalFeatures = criticalFeatures.filter(feature => !compatibility[feature]);
         
         if (missingCriticalFeatures.length > 0) {
@@ -452,11 +455,8 @@ class TranscriptionTest {
                     throw new Error('No valid audio recording found');
                 }
                 
-                // Convert audio blob to base64
-                const base64Audio = await this.blobToBase64(this.audioBlob);
-                
-                // Send to backend for transcription and evaluation
-                const response = await this.sendToBackend(base64Audio);
+                // Upload the recording as binary for transcription and evaluation
+                const response = await this.sendToBackend(this.audioBlob);
                 
                 if (response.success) {
                     this.displayEvaluationResults(response.data);
@@ -480,43 +480,11 @@ class TranscriptionTest {
         }
     }
 
-    blobToBase64(blob) {
-        return new Promise((resolve, reject) => {
-            if (!blob || !(blob instanceof Blob)) {
-                reject(new Error('Invalid blob object provided'));
-                return;
-            }
-            
-            const reader = new FileReader();
-            reader.onloadend = () => {
-                const base64 = reader.result.split(',')[1];
-                resolve(base64);
-            };
-            reader.onerror = () => {
-                reject(new Error('Failed to read blob as base64'));
-            };
-            reader.readAsDataURL(blob);
-        });
-    }
-
-    async sendToBackend(audioData) {
+    async sendToBackend(audioBlob) {
         try {
-            const response = await fetch('http://localhost:8000/transcription/evaluate', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    audioData: audioData,
-                    format: 'webm'
-                })
-            });
-            
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            
-            const result = await response.json();
+            // Multipart upload: the blob is sent as-is, without base64 inflation. The register
+            // number lets the backend try this student's best-recognised English locale first
+            const result = await apiService.uploadAudio(audioBlob, audioBlob.type || 'webm', getStudentRegisterNumber());
             return { success: true, data: result };
             
         } catch (error) {
@@ -1,6 +1,7 @@
 // Practice page logic
 import { apiService } from '../api.js';
 import { Toast } from '../components/toast.js';
+import { getStudentRegisterNumber } from '../utils.js';
 
 const form = document.getElementById('practice-form');
 const questionsSection = document.getElementById('questions-section');
@@ -50,8 +51,9 @@ form.onsubmit = async (e) => {
   try {
     const topic = document.getElementById('topic').value.trim();
     const level = document.getElementById('level').value;
-    const out = await apiService.generateCoding({ topic, level });
-    questions = out.questions || [];
+    const out = await apiService.generateCoding({ topic, level, studentRegisterNumber: getStudentRegisterNumber() });
+    // Questions carry no topic of their own; tag them with the set's so results are filed under it
+    questions = (out.questions || []).map(q => ({ ...q, topic: q.topic || topic }));
     if (!questions.length) throw new Error('No questions generated');
     
     // Initialize results array
@@ -139,9 +141,12 @@ window.nextQuestion = () => {
 
 window.submitCode = async () => {
   try {
-    const response = await apiService.evaluateCoding({
+    // Evaluates and, for students, records the attempt in one request
+    const response = await apiService.submitCoding({
       question: questions[idx].question,
-      userCode: editor.value
+      userCode: editor.value,
+      student_register_number: getStudentRegisterNumber(),
+      subject: questions[idx].topic || 'Coding'
     });
     
     // Update results for current question
@@ -152,6 +157,7 @@ window.submitCode = async () => {
       feedback: response.feedback || '',
       suggestions: response.suggestions || '',
       isCorrect: response.isCorrect || false,
+      recorded: !!response.recorded,
       timestamp: Date.now()
     };
     
@@ -243,10 +249,10 @@ window.saveToHistory = async (questionIndex) => {
     history.unshift(historyItem);
     const success = Storage.set('codingHistory', history);
 
-    // Save to backend if student logged in
+    // Save to backend if student logged in and /coding/submit did not already record it
     try {
       const cu = localStorage.getItem('currentUser');
-      if (cu) {
+      if (cu && !result.recorded) {
         const u = JSON.parse(cu);
         if (u?.user_type === 'student') {
           const codingData = {
@@ -1,6 +1,7 @@
 // Corrected: Contains verified logic for button visibility and efficient answer selection.
 import { apiService } from '../api.js';
 import { StudyLogsManager } from '../components/studyLogs.js';
+import { getStudentRegisterNumber } from '../utils.js';
 
 // Storage helper
 const Storage = {
@@ -30,6 +31,7 @@ let quiz = [];
 let userAnswers = [];
 let currentQuestionIndex = 0;
 let quizResults = null;
+let quizId = null; // server-side quiz session, graded by /quiz/submit
 
 // DOM Elements
 const domElements = {
@@ -207,19 +209,21 @@ window.generateQuiz = async (logId = null) => {
     }
 
     const response = await apiService.generateQuiz({
-      studyLog: selectedLog.content
+      studyLog: selectedLog.content,
+      student_register_number: getStudentRegisterNumber()
     });
 
     if (!response?.questions?.length) {
       throw new Error('No questions were generated by the AI');
     }
 
+    // The answer key stays on the server; only the quiz id comes back with the questions
+    quizId = response.quiz_id;
     quiz = response.questions.map(q => ({
       ...q,
       type: 'mcq',
       question: q.question,
       options: q.options || [],
-      answer: q.answer,
     }));
 
     userAnswers = new Array(quiz.length).fill(null);
@@ -354,24 +358,36 @@ async function submitQuiz() {
       return;
     }
     
+    const timeTaken = QuizTimer.getElapsedTime();
+    const studentRegisterNumber = getStudentRegisterNumber();
+
+    // Grade (and record, for students) on the server in one request; only the server has the answer key
+    const submission = await apiService.submitQuiz({
+      quiz_id: quizId,
+      answers: userAnswers,
+      student_register_number: studentRegisterNumber,
+      time_taken: timeTaken,
+      subject: 'General Quiz'
+    });
+
     let correct = 0;
     const results = [];
     
     quiz.forEach((q, index) => {
-      const isCorrect = q.answer === userAnswers[index];
+      const evaluation = submission.individualFeedback[index] || {};
+      const isCorrect = !!evaluation.isCorrect;
       if (isCorrect) correct++;
       
       results.push({
         question: q.question,
         userAnswer: q.options[userAnswers[index]] || 'Not answered',
-        correctAnswer: q.options[q.answer],
+        correctAnswer: q.options[evaluation.correctAnswer] || 'Unavailable',
         isCorrect: isCorrect,
         explanation: q.explanation || ''
       });
     });
     
-    const score = Math.round((correct / quiz.length) * 100);
-    const timeTaken = QuizTimer.getElapsedTime();
+    const score = submission.overallScore;
     QuizTimer.stop();
     
     // Format the score for display
@@ -396,9 +412,11 @@ async function submitQuiz() {
       percentage: score
     };
     
-    // Save quiz result to backend if user is logged in
+    // Save quiz result to backend if user is logged in and /quiz/submit did not already record it
     const userStr = localStorage.getItem('currentUser');
-    if (userStr) {
+    if (submission?.recorded) {
+      console.log('Quiz result recorded by /quiz/submit');
+    } else if (userStr) {
       try {
         const user = JSON.parse(userStr);
         if (user.user_type === 'student') {
@@ -33,6 +33,12 @@ export const Storage = {
   remove: (k) => { try { localStorage.removeItem(k); } catch {} },
 };
 
+// Register number of the logged-in student, or null for teachers/anonymous users
+export const getStudentRegisterNumber = () => {
+  const user = Storage.get('currentUser');
+  return user?.user_type === 'student' && user?.username ? user.username : null;
+};
+
 // Also make functions available globally for backward compatibility
 window.navigateTo = navigateTo;
 window.generateId = generateId;
@@ -42,3 +48,4 @@ window.isValidEmail = isValidEmail;
 window.sleep = sleep;
 window.Storage = Storage;
 window.showToast = showToast;
+window.getStudentRegisterNumber = getStudentRegisterNumber;